@@ -0,0 +1,113 @@
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_KEY = 'auth_token:{}'
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш ограниченного размера с временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+token_cache = LRUCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def get_token_digest(key):
+    # Сам токен не должен попадать в ключи общего кэша.
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_shared_cache():
+    if settings.AUTH_TOKEN_CACHE:
+        return caches[settings.AUTH_TOKEN_CACHE]
+    return None
+
+
+def invalidate_tokens(keys):
+    """Удаляет токены из локального и общего кэша."""
+    digests = [get_token_digest(key) for key in keys]
+    for digest in digests:
+        token_cache.delete(digest)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None and digests:
+        shared_cache.delete_many(
+            [TOKEN_CACHE_KEY.format(digest) for digest in digests])
+
+
+def invalidate_user_tokens(user_ids):
+    """
+    Удаляет из кэша токены пользователей.
+
+    QuerySet.update() не отправляет сигналы, поэтому после, например,
+    User.objects.filter(...).update(is_active=False) эту функцию нужно
+    вызвать явно, иначе токены действуют до истечения AUTH_TOKEN_CACHE_TTL.
+    """
+    invalidate_tokens(Token.objects.filter(
+        user_id__in=user_ids).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кэшированием пары (пользователь, токен).
+
+    Если задан общий кэш AUTH_TOKEN_CACHE, используется только он:
+    сброс при выходе или сохранении пользователя (см. api.signals)
+    сразу виден всем процессам. Без него записи лежат в LRU-кэше
+    процесса, и в других процессах устаревают через AUTH_TOKEN_CACHE_TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        digest = get_token_digest(key)
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            cache_key = TOKEN_CACHE_KEY.format(digest)
+            credentials = shared_cache.get(cache_key)
+            if credentials is None:
+                credentials = super().authenticate_credentials(key)
+                shared_cache.set(
+                    cache_key, credentials, settings.AUTH_TOKEN_CACHE_TTL)
+        else:
+            credentials = token_cache.get(digest)
+            if credentials is None:
+                credentials = super().authenticate_credentials(key)
+                token_cache.set(digest, credentials)
+        user, token = credentials
+        # Копия, чтобы запросы не делили состояние одного объекта.
+        return copy.copy(user), token
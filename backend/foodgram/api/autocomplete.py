@@ -0,0 +1,62 @@
+import threading
+from bisect import bisect_left
+
+from .cache import get_data_version
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """
+    Индекс названий ингредиентов в памяти процесса для автодополнения.
+
+    Хранит отсортированный список (название в нижнем регистре, ингредиент)
+    и ищет префикс двоичным поиском. Индекс строится при первом запросе
+    и перестраивается, когда меняется версия данных Ingredient.
+    Ключи и ингредиенты заменяются одним присваиванием кортежа, поэтому
+    search без блокировки всегда видит согласованную пару.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.entries = ([], [])
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        version = get_data_version(Ingredient)
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            items = sorted(
+                ((ingredient.name.casefold(), ingredient.pk), ingredient)
+                for ingredient in Ingredient.objects.all()
+            )
+            self.entries = (
+                [key for key, ingredient in items],
+                [ingredient for key, ingredient in items],
+            )
+            self.version = version
+
+    def search(self, query):
+        """
+        Ищет ингредиенты без учёта регистра.
+
+        Сначала возвращаются совпадения по началу названия,
+        затем совпадения по подстроке.
+        """
+        self.refresh()
+        keys, ingredients = self.entries
+        query = query.casefold()
+        start = bisect_left(keys, (query,))
+        end = start
+        while end < len(keys) and keys[end][0].startswith(query):
+            end += 1
+        substring_matches = [
+            ingredient for (name, pk), ingredient in zip(keys, ingredients)
+            if query in name and not name.startswith(query)
+        ]
+        return ingredients[start:end] + substring_matches
+
+
+ingredient_index = IngredientIndex()
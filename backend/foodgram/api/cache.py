@@ -0,0 +1,57 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+SHOPPING_CART_KEY = 'shopping_cart:{}'
+DATA_VERSION_KEY = 'data_version:{}'
+
+
+def get_shopping_cart_etag(user):
+    """
+    Возвращает ETag списка покупок пользователя.
+
+    В кэше SHOPPING_CART_CACHE хранится только метка версии корзины:
+    сигналы api.signals удаляют её при изменении корзины или ингредиентов
+    её рецептов, и следующий запрос получает новую метку.
+    """
+    carts = caches[settings.SHOPPING_CART_CACHE]
+    key = SHOPPING_CART_KEY.format(user.pk)
+    etag = carts.get(key)
+    if etag is None:
+        etag = uuid.uuid4().hex
+        # Метку мог одновременно записать параллельный запрос.
+        if not carts.add(key, etag, settings.SHOPPING_CART_CACHE_TIMEOUT):
+            etag = carts.get(key, etag)
+    return etag
+
+
+def invalidate_shopping_carts(user_ids):
+    """Сбрасывает метки списков покупок указанных пользователей."""
+    caches[settings.SHOPPING_CART_CACHE].delete_many(
+        [SHOPPING_CART_KEY.format(user_id) for user_id in user_ids])
+
+
+def get_data_version(model):
+    """
+    Возвращает счётчик версии данных модели из общего кэша.
+
+    Счётчик общий для всех процессов; при отсутствии в кэше
+    инициализируется текущим временем, чтобы не совпасть с прежними.
+    """
+    key = DATA_VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(model):
+    """Увеличивает счётчик версии данных модели."""
+    key = DATA_VERSION_KEY.format(model._meta.label_lower)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+
+class PrimaryKeyListField(serializers.ListField):
+    """
+    Список первичных ключей, который проверяется одним запросом.
+
+    В отличие от PrimaryKeyRelatedField(many=True) все объекты
+    загружаются через in_bulk, а в ошибке перечисляются сразу
+    все несуществующие ключи.
+    """
+
+    child = serializers.IntegerField(min_value=1)
+    default_error_messages = {
+        'unique': 'Значения должны быть уникальными.',
+        'does_not_exist': 'Объекты не найдены: {pk_list}.',
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pks = super().to_internal_value(data)
+        if len(set(pks)) != len(pks):
+            self.fail('unique')
+        objects = self.queryset.in_bulk(pks)
+        missing = [str(pk) for pk in pks if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_list=', '.join(missing))
+        return [objects[pk] for pk in pks]
+
+    def to_representation(self, data):
+        if hasattr(data, 'all'):
+            data = data.all()
+        return [item.pk for item in data]
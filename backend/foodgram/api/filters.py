@@ -1,6 +1,8 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from .querysets import search_recipes
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 
 
 class RecipeFilter(filters.FilterSet):
@@ -8,34 +10,58 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart')
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'По популярности'),),
+        method='get_ordering'
+    )
     tags = filters.ModelMultipleChoiceFilter(
         queryset=Tag.objects.all(),
         field_name='tags__slug',
         to_field_name='slug',
+        method='get_tags'
     )
 
+    def get_tags(self, queryset, name, value):
+        """Фильтр через EXISTS: JOIN с тегами дублировал бы рецепты."""
+        if not value:
+            return queryset
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag__in=value)))
+
+    def filter_by_user(self, queryset, model):
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            recipe=OuterRef('pk'), user=self.request.user)))
+
     def get_is_in_shopping_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                shoppingcart__user=self.request.user
-            )
+            return self.filter_by_user(queryset, ShoppingCart)
         return queryset
 
     def get_is_favorited(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                favorite__user=self.request.user
-            )
+            return self.filter_by_user(queryset, Favorite)
         return queryset
 
+    def get_search(self, queryset, name, value):
+        """Стоит перед ordering, чтобы явная сортировка была важнее rank."""
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        """Сортировка по счётчику избранного использует recipe_popular_idx."""
+        return queryset.order_by('-favorites_count', '-publish_date')
+
     class Meta:
         model = Recipe
         fields = ['author', 'is_in_shopping_cart', 'tags']
 
 
 class IngredientFilter(filters.FilterSet):
+    """istartswith в PostgreSQL использует ingredient_upper_name_idx."""
     name = filters.CharFilter(
-        field_name='name', lookup_expr='startswith')
+        field_name='name', lookup_expr='istartswith')
 
     class Meta:
         model = Ingredient
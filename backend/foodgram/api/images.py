@@ -0,0 +1,160 @@
+import binascii
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import connections
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, UnidentifiedImageError, features
+from rest_framework.fields import ImageField
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+DECODE_CHUNK_SIZE = 64 * 1024
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+THUMBNAIL_EXTENSION = THUMBNAIL_FORMAT.lower().replace('jpeg', 'jpg')
+
+thumbnail_executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails'
+)
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """
+    Base64ImageField, декодирующий изображение по частям во временный файл.
+
+    Декодированные байты не собираются в памяти целиком: они пишутся
+    в TemporaryUploadedFile, который хранилище затем перемещает
+    в MEDIA_ROOT без копирования. Размер ограничен IMAGE_MAX_SIZE.
+    """
+    TOO_LARGE_MESSAGE = 'Размер изображения превышает {} байт.'
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            return super().to_internal_value(base64_data)
+        content_type = None
+        if ';base64,' in base64_data:
+            header, base64_data = base64_data.split(';base64,', 1)
+            if self.trust_provided_content_type:
+                content_type = header.replace('data:', '')
+        upload = TemporaryUploadedFile(
+            self.get_file_name(None), content_type, 0, None)
+        try:
+            upload.size = self.decode_to_file(base64_data, upload)
+            extension = self.get_upload_extension(upload)
+        except ValidationError:
+            upload.close()
+            raise
+        if extension not in self.ALLOWED_TYPES:
+            upload.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        upload.name = f'{upload.name}.{extension}'
+        upload.seek(0)
+        return ImageField.to_internal_value(self, upload)
+
+    def decode_to_file(self, base64_data, file):
+        """Декодирует base64 порциями, кратными 4 символам."""
+        size = 0
+        tail = ''
+        for start in range(0, len(base64_data), DECODE_CHUNK_SIZE):
+            chunk = tail + ''.join(
+                base64_data[start:start + DECODE_CHUNK_SIZE].split())
+            cut = len(chunk) - len(chunk) % 4
+            chunk, tail = chunk[:cut], chunk[cut:]
+            try:
+                decoded = binascii.a2b_base64(chunk)
+            except binascii.Error:
+                raise ValidationError(self.INVALID_FILE_MESSAGE)
+            size += len(decoded)
+            if size > settings.IMAGE_MAX_SIZE:
+                raise ValidationError(
+                    self.TOO_LARGE_MESSAGE.format(settings.IMAGE_MAX_SIZE))
+            file.write(decoded)
+        if tail or not size:
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        return size
+
+    def get_upload_extension(self, file):
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                extension = image.format.lower()
+        except (UnidentifiedImageError, OSError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        return 'jpg' if extension == 'jpeg' else extension
+
+
+def get_thumbnail_name(image_name):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{settings.THUMBNAIL_DIR}{stem}.{THUMBNAIL_EXTENSION}'
+
+
+def get_thumbnail_url(recipe, request=None):
+    """
+    Возвращает URL миниатюры или оригинала, пока миниатюры нет.
+
+    Имя миниатюры хранится в Recipe.thumbnail, поэтому хранилище
+    не опрашивается; запись для прежнего изображения не подходит по имени.
+    """
+    image = recipe.image
+    if not image:
+        return None
+    if recipe.thumbnail == get_thumbnail_name(image.name):
+        url = default_storage.url(recipe.thumbnail)
+    else:
+        url = image.url
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def make_thumbnail(recipe_id, image_name):
+    """Создаёт миниатюру изображения и записывает её имя в рецепт."""
+    thumbnail_name = get_thumbnail_name(image_name)
+    if not default_storage.exists(thumbnail_name):
+        with default_storage.open(image_name) as source:
+            with Image.open(source) as image:
+                image.thumbnail(settings.THUMBNAIL_SIZE)
+                if image.mode not in ('RGB', 'RGBA') or (
+                        THUMBNAIL_FORMAT == 'JPEG' and image.mode == 'RGBA'):
+                    image = image.convert('RGB')
+                buffer = io.BytesIO()
+                image.save(buffer, THUMBNAIL_FORMAT, quality=80)
+        thumbnail_name = default_storage.save(
+            thumbnail_name, ContentFile(buffer.getvalue()))
+    # Условие по image: пока шла обработка, изображение могли заменить.
+    Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        thumbnail=thumbnail_name)
+    return thumbnail_name
+
+
+def make_thumbnail_logged(recipe_id, image_name):
+    try:
+        return make_thumbnail(recipe_id, image_name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру для %s', image_name)
+
+
+def make_thumbnail_in_background(recipe_id, image_name):
+    try:
+        return make_thumbnail_logged(recipe_id, image_name)
+    finally:
+        # Соединения потока пула не закрываются сигналами запроса.
+        connections.close_all()
+
+
+def schedule_thumbnail(recipe_id, image_name):
+    """Ставит создание миниатюры в очередь пула фоновых потоков."""
+    return thumbnail_executor.submit(
+        make_thumbnail_in_background, recipe_id, image_name)
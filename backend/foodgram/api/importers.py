@@ -0,0 +1,64 @@
+import csv
+import gzip
+import json
+import time
+from itertools import islice
+
+
+def open_text(path, mode='rt'):
+    """Открывает файл данных, прозрачно распаковывая .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_records(path, fieldnames=None):
+    """
+    Построчно читает записи из CSV, NDJSON (.jsonl, .ndjson) или JSON.
+
+    CSV и NDJSON не загружаются в память целиком. Для CSV без
+    заголовка нужно передать fieldnames, строка заголовка с такими
+    же именами в этом случае пропускается.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    with open_text(path) as file:
+        if name.endswith('.csv'):
+            for row in csv.DictReader(file, fieldnames=fieldnames):
+                if fieldnames and list(row.values()) == list(fieldnames):
+                    continue
+                yield row
+        elif name.endswith(('.jsonl', '.ndjson')):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(file)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Progress:
+    """Выводит число обработанных строк и скорость в строках в секунду."""
+
+    def __init__(self, stdout, label):
+        self.stdout = stdout
+        self.label = label
+        self.rows = 0
+        self.started = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.rows / elapsed if elapsed else 0
+
+    def update(self, rows):
+        self.rows += rows
+        self.stdout.write(
+            f'{self.label}: {self.rows} строк, {self.rate:.0f} строк/с')
@@ -0,0 +1,216 @@
+import json
+import platform
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from api.profiling import QueryRecorder, percentile
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Subscription, User
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), capture_output=True,
+            text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_endpoints():
+    """Пары (название, путь, нужна ли авторизация)."""
+    recipe = Recipe.objects.order_by('-favorites_count').first()
+    word = recipe.name.split()[0]
+    return (
+        ('recipes-list', '/api/recipes/?page=1&limit=6', False),
+        ('recipes-list-auth', '/api/recipes/?page=1&limit=6', True),
+        ('recipes-list-cursor', '/api/recipes/?pagination=cursor&limit=6',
+         True),
+        ('recipes-list-filtered',
+         '/api/recipes/?is_favorited=1&page=1&limit=6', True),
+        ('recipes-list-popular',
+         '/api/recipes/?ordering=popular&page=1&limit=6', False),
+        ('recipes-search', f'/api/recipes/?search={word}&page=1&limit=6',
+         False),
+        ('recipes-detail', f'/api/recipes/{recipe.pk}/', True),
+        ('users-subscriptions',
+         '/api/users/subscriptions/?page=1&limit=6&recipes_limit=3', True),
+        ('recipes-download-shopping-cart-txt',
+         '/api/recipes/download_shopping_cart/?format=txt', True),
+        ('recipes-download-shopping-cart-pdf',
+         '/api/recipes/download_shopping_cart/?format=pdf', True),
+        ('ingredients-search', f'/api/ingredients/?name={word[:3]}', False),
+        ('tags-list', '/api/tags/', False),
+    )
+
+
+class DjangoClientTransport:
+    """
+    Запросы через тестовый клиент Django с подсчётом SQL-запросов.
+
+    Тестовый клиент не закрывает соединения с БД между запросами,
+    поэтому это делается явно, как в WSGI-сервере: так в замерах
+    видна разница между CONN_MAX_AGE=0 и постоянными соединениями.
+    """
+
+    def __init__(self, token):
+        self.client = Client()
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        self.connections = 0
+        connection_created.connect(self.count_connection)
+
+    def count_connection(self, **kwargs):
+        self.connections += 1
+
+    def get(self, path, auth):
+        headers = self.headers if auth else {}
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(path, **headers)
+        close_old_connections()
+        return response.status_code, recorder.count
+
+
+class HTTPTransport:
+    """
+    Запросы к запущенному серверу.
+
+    Число SQL-запросов берётся из заголовка Server-Timing, если на
+    сервере включено профилирование (PROFILING_ENABLED).
+    """
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.connections = None
+
+    def get(self, path, auth):
+        request = urllib.request.Request(self.base_url + path)
+        if auth:
+            request.add_header('Authorization', f'Token {self.token}')
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+                timing = response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as error:
+            status, timing = error.code, ''
+        queries = None
+        if 'queries"' in timing:
+            queries = int(timing.split('desc="')[1].split()[0])
+        return status, queries
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95/p99), число SQL-запросов и '
+            'пропускную способность основных эндпоинтов API. Данные '
+            'готовит generate_benchmark_data, результат пишется в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--endpoint', action='append', default=[],
+                            help='Запустить только указанные эндпоинты.')
+        parser.add_argument('--base-url',
+                            help='Адрес запущенного сервера вместо '
+                                 'тестового клиента Django.')
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        user = User.objects.annotate(
+            cart=Count('shoppingcart')).order_by('-cart').first()
+        if user is None or not Recipe.objects.exists():
+            raise CommandError('Нет данных: запустите generate_benchmark_data')
+        token, _ = Token.objects.get_or_create(user=user)
+        if options['base_url']:
+            transport = HTTPTransport(options['base_url'], token.key)
+        else:
+            transport = DjangoClientTransport(token.key)
+        results = []
+        for name, path, auth in get_endpoints():
+            if options['endpoint'] and name not in options['endpoint']:
+                continue
+            result = self.measure(
+                transport, path, auth, options['requests'],
+                options['warmup'])
+            result['endpoint'] = name
+            results.append(result)
+            self.stdout.write(
+                f'{name:40} p50 {result["latency_ms"]["p50"]:8.1f} ms  '
+                f'p95 {result["latency_ms"]["p95"]:8.1f} ms  '
+                f'p99 {result["latency_ms"]["p99"]:8.1f} ms  '
+                f'{result["throughput_rps"]:7.1f} rps  '
+                f'queries {result["queries_per_request"]}  '
+                f'connections {result["connections_per_request"]}')
+        report = {
+            'commit': get_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'conn_max_age': settings.DATABASES['default'].get(
+                'CONN_MAX_AGE', 0),
+            'transport': 'http' if options['base_url'] else 'django-client',
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'recipe_ingredients': RecipeIngredient.objects.count(),
+                'favorites': Favorite.objects.count(),
+                'shopping_carts': ShoppingCart.objects.count(),
+                'subscriptions': Subscription.objects.count(),
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def measure(self, transport, path, auth, requests, warmup):
+        for _ in range(warmup):
+            transport.get(path, auth)
+        latencies = []
+        queries = []
+        errors = 0
+        connections_before = transport.connections
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            status, count = transport.get(path, auth)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            if status >= 400:
+                errors += 1
+            if count is not None:
+                queries.append(count)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'path': path,
+            'requests': requests,
+            'errors': errors,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries_per_request': (
+                round(sum(queries) / len(queries), 1) if queries else None),
+            'throughput_rps': round(requests / elapsed, 1),
+            'connections_per_request': (
+                None if connections_before is None else
+                round((transport.connections - connections_before)
+                      / requests, 2)),
+        }
@@ -0,0 +1,84 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.autocomplete import ingredient_index
+from api.filters import IngredientFilter
+from api.profiling import percentile
+from recipes.models import Ingredient
+
+
+def search_orm(query):
+    """ORM-путь с тем же порядком: сначала начало названия, затем подстрока."""
+    queryset = Ingredient.objects.order_by('name')
+    prefix = IngredientFilter({'name': query}, queryset=queryset).qs
+    substring = queryset.filter(
+        name__icontains=query).exclude(name__istartswith=query)
+    return list(prefix) + list(substring)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск ингредиентов по индексу в памяти процесса '
+            '(api.autocomplete) с ORM-запросами через IngredientFilter.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError('Нет ингредиентов: запустите load_ingredients')
+        generator = random.Random(options['seed'])
+        # Префиксы длиной 1–4 символа, как при наборе в автодополнении.
+        queries = [
+            name[:generator.randint(1, 4)]
+            for name in generator.choices(names, k=options['queries'])
+        ]
+        started = time.perf_counter()
+        ingredient_index.refresh()
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'Построение индекса: {build_ms:.1f} ms')
+        results = [
+            self.measure('index', ingredient_index.search, queries),
+            self.measure('orm', search_orm, queries),
+        ]
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'database': connection.vendor,
+                    'ingredients': len(names),
+                    'queries': len(queries),
+                    'index_build_ms': round(build_ms, 1),
+                    'results': results,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def measure(self, name, search, queries):
+        latencies = []
+        matches = 0
+        for query in queries:
+            started = time.perf_counter()
+            matches += len(search(query))
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        result = {
+            'path': name,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+            },
+            'matches_per_query': round(matches / len(queries), 1),
+        }
+        self.stdout.write(
+            f'{name:6} p50 {result["latency_ms"]["p50"]:8.3f} ms  '
+            f'p95 {result["latency_ms"]["p95"]:8.3f} ms  '
+            f'p99 {result["latency_ms"]["p99"]:8.3f} ms  '
+            f'совпадений {result["matches_per_query"]}')
+        return result
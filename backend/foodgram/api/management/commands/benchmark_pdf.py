@@ -0,0 +1,83 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from api.pdf import FONT_NAME, FONT_PATH, ChunkStream, render_pdf
+from api.profiling import percentile
+
+
+def legacy_pdf(lines):
+    """Прежний get_pdf_file: шрифт регистрируется при каждом вызове."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+    pdf.setFont(FONT_NAME, 10)
+    bottom = 800
+    for line in lines:
+        pdf.drawString(22, bottom, line)
+        bottom -= 20
+    pdf.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def current_pdf(lines):
+    return b''.join(render_pdf(lines, ChunkStream()))
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга PDF списка покупок прежним '
+            'способом (регистрация шрифта на каждый запрос) и через api.pdf.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=40)
+        parser.add_argument('--runs', type=int, default=100)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        lines = ['Не забыть купить:'] + [
+            f'Ингредиент {number} {number * 10} г'
+            for number in range(options['lines'])
+        ]
+        results = [
+            self.measure('legacy', legacy_pdf, lines, options['runs']),
+            self.measure('api.pdf', current_pdf, lines, options['runs']),
+        ]
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'lines': len(lines),
+                    'runs': options['runs'],
+                    'results': results,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def measure(self, name, render, lines, runs):
+        latencies = []
+        size = 0
+        for _ in range(runs):
+            started = time.perf_counter()
+            size = len(render(lines))
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        result = {
+            'path': name,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'size': size,
+        }
+        self.stdout.write(
+            f'{name:8} p50 {result["latency_ms"]["p50"]:8.2f} ms  '
+            f'p95 {result["latency_ms"]["p95"]:8.2f} ms  '
+            f'max {result["latency_ms"]["max"]:8.2f} ms  '
+            f'размер {size}')
+        return result
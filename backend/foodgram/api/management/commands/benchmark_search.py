@@ -0,0 +1,83 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from api.profiling import percentile
+from api.querysets import search_recipes
+from recipes.models import Recipe
+
+
+def search_substring(queryset, query):
+    """Поиск по вхождению подстроки, как без полнотекстового индекса."""
+    return queryset.filter(
+        Q(name__icontains=query) | Q(text__icontains=query)
+    ).order_by('-publish_date', '-id')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет поиск рецептов: полнотекстовый (PostgreSQL или FTS5 '
+            'в SQLite) и по вхождению подстроки. Каждый запрос, как в API, '
+            'считает совпадения и загружает первую страницу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        names = list(Recipe.objects.order_by('?').values_list(
+            'name', flat=True)[:1000])
+        if not names:
+            raise CommandError('Нет данных: запустите generate_benchmark_data')
+        generator = random.Random(options['seed'])
+        queries = [
+            generator.choice(name.split())
+            for name in generator.choices(names, k=options['queries'])
+        ]
+        results = [
+            self.measure('full-text', search_recipes, queries,
+                         options['limit']),
+            self.measure('icontains', search_substring, queries,
+                         options['limit']),
+        ]
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'database': connection.vendor,
+                    'recipes': Recipe.objects.count(),
+                    'queries': len(queries),
+                    'results': results,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def measure(self, name, search, queries, limit):
+        latencies = []
+        matches = 0
+        for query in queries:
+            started = time.perf_counter()
+            found = search(Recipe.objects.all(), query)
+            matches += found.count()
+            list(found[:limit])
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        result = {
+            'path': name,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+            },
+            'matches_per_query': round(matches / len(queries), 1),
+        }
+        self.stdout.write(
+            f'{name:10} p50 {result["latency_ms"]["p50"]:9.2f} ms  '
+            f'p95 {result["latency_ms"]["p95"]:9.2f} ms  '
+            f'p99 {result["latency_ms"]["p99"]:9.2f} ms  '
+            f'совпадений {result["matches_per_query"]}')
+        return result
@@ -0,0 +1,127 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from api.cache import invalidate_shopping_carts
+from api.profiling import percentile
+from api.services import get_shopping_cart_ingredients
+from recipes.models import Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from users.models import User
+
+URL = '/api/recipes/download_shopping_cart/?format={}'
+FORMATS = ('txt', 'csv', 'json', 'pdf')
+
+
+def legacy_shopping_cart(user):
+    """Прежний запрос: DISTINCT по ингредиентам с вложенными подзапросами."""
+    recipes = Recipe.objects.filter(shoppingcart__user=user)
+    recipe_ingredients = RecipeIngredient.objects.filter(recipe__in=recipes)
+    return list(Ingredient.objects.filter(
+        recipeingredient__in=recipe_ingredients
+    ).distinct().annotate(amount_sum=Sum(
+        'recipeingredient__amount',
+        filter=Q(recipeingredient__in=recipe_ingredients)
+    )))
+
+
+class Command(BaseCommand):
+    help = ('Замеряет выгрузку списка покупок без кэша: агрегирующий '
+            'запрос (прежний и текущий) и потоковую выгрузку в каждом '
+            'формате. Перед каждым замером метка корзины сбрасывается, '
+            'поэтому каждый раз выполняется GROUP BY по RecipeIngredient.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--cart-size', type=int, default=0,
+                            help='Дополнить корзину пользователя '
+                                 'до указанного числа рецептов.')
+        parser.add_argument('--format', action='append', default=[],
+                            choices=FORMATS)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        user = User.objects.annotate(
+            cart=Count('shoppingcart')).order_by('-cart').first()
+        if user is None or not Recipe.objects.exists():
+            raise CommandError('Нет данных: запустите generate_benchmark_data')
+        if options['cart_size']:
+            self.fill_cart(user, options['cart_size'], options['seed'])
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.user = user
+        runs = options['runs']
+        results = [
+            self.measure('legacy-query', lambda: legacy_shopping_cart(user),
+                         runs),
+            self.measure(
+                'query', lambda: list(get_shopping_cart_ingredients(user)),
+                runs),
+        ]
+        for file_format in options['format'] or FORMATS:
+            results.append(self.measure(
+                f'download-{file_format}',
+                lambda: self.download(file_format), runs))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({
+                    'database': connection.vendor,
+                    'recipe_ingredients': RecipeIngredient.objects.count(),
+                    'cart_recipes': ShoppingCart.objects.filter(
+                        user=user).count(),
+                    'cart_rows': RecipeIngredient.objects.filter(
+                        recipe__shoppingcart__user=user).count(),
+                    'results': results,
+                }, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты записаны в {options["output"]}'))
+
+    def fill_cart(self, user, size, seed):
+        missing = size - ShoppingCart.objects.filter(user=user).count()
+        if missing <= 0:
+            return
+        recipe_ids = list(Recipe.objects.exclude(
+            shoppingcart__user=user).values_list('pk', flat=True))
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=user, recipe_id=recipe_id)
+            for recipe_id in random.Random(seed).sample(
+                recipe_ids, min(missing, len(recipe_ids)))
+        ], ignore_conflicts=True)
+
+    def download(self, file_format):
+        response = self.client.get(URL.format(file_format))
+        if response.status_code != 200:
+            raise CommandError(
+                f'{file_format}: статус {response.status_code}')
+        return b''.join(response.streaming_content)
+
+    def measure(self, name, run, runs):
+        latencies = []
+        size = 0
+        for _ in range(runs):
+            invalidate_shopping_carts([self.user.pk])
+            started = time.perf_counter()
+            size = len(run())
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        result = {
+            'path': name,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'size': size,
+        }
+        self.stdout.write(
+            f'{name:14} p50 {result["latency_ms"]["p50"]:9.2f} ms  '
+            f'p95 {result["latency_ms"]["p95"]:9.2f} ms  '
+            f'max {result["latency_ms"]["max"]:9.2f} ms  '
+            f'размер {size}')
+        return result
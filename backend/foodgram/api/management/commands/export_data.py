@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.importers import Progress, open_text
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+# Порядок важен: таблица выгружается после тех, на которые ссылается.
+EXPORT_MODELS = (
+    User, Tag, Ingredient, Recipe, Recipe.tags.through, RecipeIngredient,
+    Favorite, ShoppingCart, Subscription,
+)
+# Заполняется триггером при загрузке.
+SKIP_FIELDS = {'search_vector'}
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder обрезает время до миллисекунд."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, рецепты, избранное, списки покупок и '
+            'подписки в NDJSON (или .gz) с постоянным расходом памяти. '
+            'Внешние ключи сохраняются как id. Загрузка: import_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, path, chunk_size, **options):
+        encoder = ExportEncoder(ensure_ascii=False)
+        with open_text(path, 'wt') as file:
+            for model in EXPORT_MODELS:
+                label = model._meta.label_lower
+                fields = [
+                    field.attname for field in model._meta.concrete_fields
+                    if field.name not in SKIP_FIELDS
+                ]
+                rows = model.objects.order_by('pk').values(
+                    *fields).iterator(chunk_size=chunk_size)
+                progress = Progress(self.stdout, label)
+                count = 0
+                for row in rows:
+                    file.write(encoder.encode(
+                        {'model': label, 'fields': row}))
+                    file.write('\n')
+                    count += 1
+                    if count == chunk_size:
+                        progress.update(count)
+                        count = 0
+                progress.update(count)
+        self.stdout.write(self.style.SUCCESS(f'Данные выгружены в {path}'))
@@ -0,0 +1,185 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import bump_data_version
+from api.importers import Progress, chunked
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+USERNAME_PREFIX = 'bench_'
+BENCHMARK_PASSWORD = 'benchmark-password'
+IMAGE_NAME = 'recipes/images/benchmark.png'
+# Минимальный PNG 1x1, чтобы у рецептов было существующее изображение.
+IMAGE_CONTENT = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360f8cfc0f01f0005000201e2b0'
+    '5e0a0000000049454e44ae426082'
+)
+WORDS = (
+    'борщ', 'суп', 'салат', 'пирог', 'каша', 'котлеты', 'плов', 'блины',
+    'омлет', 'запеканка', 'рагу', 'паста', 'курица', 'говядина', 'рыба',
+    'грибы', 'картофель', 'капуста', 'свёкла', 'морковь', 'томаты', 'сыр',
+    'творог', 'яблоки', 'ягоды', 'шоколад', 'быстро', 'домашний',
+    'праздничный', 'постный', 'острый', 'сладкий', 'запечённый', 'тушёный',
+)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетические данные для команды benchmark: '
+            'пользователей, рецепты с ингредиентами и тегами, избранное, '
+            'списки покупок и подписки. Пользователи получают префикс '
+            f'{USERNAME_PREFIX} и пароль {BENCHMARK_PASSWORD}.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients', type=int, default=2000,
+                            help='Минимальное число ингредиентов в базе.')
+        parser.add_argument('--tags', type=int, default=5)
+        parser.add_argument('--ingredients-per-recipe', type=int, nargs=2,
+                            default=(3, 15), metavar=('MIN', 'MAX'))
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить данные предыдущего запуска.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if options['clear']:
+            deleted, _ = User.objects.filter(
+                username__startswith=USERNAME_PREFIX).delete()
+            self.stdout.write(f'Удалено объектов: {deleted}')
+        if not default_storage.exists(IMAGE_NAME):
+            default_storage.save(IMAGE_NAME, ContentFile(IMAGE_CONTENT))
+        ingredient_ids = self.create_ingredients(options['ingredients'])
+        tag_ids = self.create_tags(options['tags'])
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, ingredient_ids, tag_ids,
+            options['ingredients_per_recipe'])
+        self.create_relations(
+            Favorite, user_ids, recipe_ids, options['favorites_per_user'])
+        self.create_relations(
+            ShoppingCart, user_ids, recipe_ids, options['cart_per_user'])
+        self.create_subscriptions(
+            user_ids, options['subscriptions_per_user'])
+        # bulk_create минует сигналы счётчиков и кэшей.
+        call_command('recount_recipe_counters', stdout=self.stdout)
+        call_command('recount_user_counters', stdout=self.stdout)
+        bump_data_version(Ingredient)
+        bump_data_version(Tag)
+        self.stdout.write(self.style.SUCCESS('Данные для бенчмарка созданы'))
+
+    def bulk_create(self, model, objects, label):
+        progress = Progress(self.stdout, label)
+        for chunk in chunked(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, ignore_conflicts=True)
+            progress.update(len(chunk))
+
+    def create_ingredients(self, count):
+        missing = count - Ingredient.objects.count()
+        if missing > 0:
+            units = ('г', 'кг', 'мл', 'л', 'шт.', 'по вкусу')
+            self.bulk_create(Ingredient, (
+                Ingredient(
+                    name=f'{self.random.choice(WORDS)} {number}',
+                    measurement_unit=self.random.choice(units))
+                for number in range(missing)
+            ), 'Ингредиенты')
+        return list(Ingredient.objects.values_list('pk', flat=True))
+
+    def create_tags(self, count):
+        for number in range(count):
+            Tag.objects.get_or_create(
+                slug=f'bench-{number}',
+                defaults={'name': f'Тег {number}',
+                          'color': f'#{number * 40 % 256:02x}8080'})
+        return list(Tag.objects.values_list('pk', flat=True))
+
+    def create_users(self, count):
+        password = make_password(BENCHMARK_PASSWORD)
+        start = User.objects.filter(
+            username__startswith=USERNAME_PREFIX).count()
+        self.bulk_create(User, (
+            User(
+                username=f'{USERNAME_PREFIX}{number}',
+                email=f'{USERNAME_PREFIX}{number}@example.com',
+                first_name='Бенчмарк', last_name=str(number),
+                password=password)
+            for number in range(start, start + count)
+        ), 'Пользователи')
+        return list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).values_list('pk', flat=True))
+
+    def create_recipes(self, count, user_ids, ingredient_ids, tag_ids,
+                       ingredients_per_recipe):
+        progress = Progress(self.stdout, 'Рецепты')
+        low, high = ingredients_per_recipe
+        through = Recipe.tags.through
+        for chunk in chunked(range(count), self.batch_size):
+            with transaction.atomic():
+                last_pk = Recipe.objects.order_by('-pk').values_list(
+                    'pk', flat=True).first() or 0
+                Recipe.objects.bulk_create([
+                    Recipe(
+                        author_id=self.random.choice(user_ids),
+                        name=' '.join(self.random.sample(WORDS, 3)),
+                        text=' '.join(self.random.choices(WORDS, k=40)),
+                        cooking_time=self.random.randint(5, 180),
+                        image=IMAGE_NAME)
+                    for _ in chunk
+                ])
+                # SQLite в Django 3.2 не возвращает pk из bulk_create.
+                new_ids = list(Recipe.objects.filter(
+                    pk__gt=last_pk).values_list('pk', flat=True))
+                RecipeIngredient.objects.bulk_create([
+                    RecipeIngredient(
+                        recipe_id=recipe_id, ingredient_id=ingredient_id,
+                        amount=self.random.randint(1, 1000))
+                    for recipe_id in new_ids
+                    for ingredient_id in self.random.sample(
+                        ingredient_ids,
+                        min(self.random.randint(low, high),
+                            len(ingredient_ids)))
+                ], batch_size=self.batch_size)
+                through.objects.bulk_create([
+                    through(recipe_id=recipe_id, tag_id=tag_id)
+                    for recipe_id in new_ids
+                    for tag_id in self.random.sample(
+                        tag_ids, min(self.random.randint(1, 3), len(tag_ids)))
+                ], batch_size=self.batch_size)
+            progress.update(len(chunk))
+        return list(Recipe.objects.values_list('pk', flat=True))
+
+    def create_relations(self, model, user_ids, recipe_ids, per_user):
+        per_user = min(per_user, len(recipe_ids))
+        self.bulk_create(model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in self.random.sample(recipe_ids, per_user)
+        ), model._meta.verbose_name_plural)
+
+    def create_subscriptions(self, user_ids, per_user):
+        per_user = min(per_user, len(user_ids) - 1)
+        self.bulk_create(Subscription, (
+            Subscription(subscriber_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in [
+                author_id for author_id in self.random.sample(
+                    user_ids, per_user + 1)
+                if author_id != user_id
+            ][:per_user]
+        ), 'Подписки')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.images import get_thumbnail_name, make_thumbnail_logged
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие миниатюры изображений рецептов '
+            'и записывает их имена в рецепты.')
+
+    def handle(self, *args, **options):
+        created = 0
+        recipes = Recipe.objects.exclude(image='').values_list(
+            'pk', 'image', 'thumbnail')
+        for recipe_id, image_name, thumbnail in recipes.iterator():
+            if thumbnail == get_thumbnail_name(image_name):
+                continue
+            if make_thumbnail_logged(recipe_id, image_name):
+                created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {created}'))
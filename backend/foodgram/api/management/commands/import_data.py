@@ -0,0 +1,67 @@
+from itertools import groupby
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from api.cache import bump_data_version
+from api.importers import Progress, chunked, read_records
+from recipes.models import Ingredient, Tag
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_data через bulk_create. Строки с уже '
+            'существующими первичными ключами пропускаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, path, batch_size, **options):
+        models = []
+        for label, records in groupby(
+                read_records(path), key=lambda record: record['model']):
+            model = apps.get_model(label)
+            models.append(model)
+            auto_fields = [
+                field.attname for field in model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)
+            ]
+            progress = Progress(self.stdout, label)
+            for chunk in chunked(records, batch_size):
+                with transaction.atomic():
+                    self.import_chunk(model, chunk, auto_fields)
+                progress.update(len(chunk))
+        # Явные первичные ключи не сдвигают последовательности PostgreSQL.
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        for model in (Ingredient, Tag):
+            if model in models:
+                bump_data_version(model)
+        self.stdout.write(self.style.SUCCESS(f'Данные загружены из {path}'))
+
+    def import_chunk(self, model, chunk, auto_fields):
+        """
+        auto_now_add перезаписывается в bulk_create, его восстанавливает
+        bulk_update только у вставленных строк: существующие не меняются.
+        """
+        objects = [model(**record['fields']) for record in chunk]
+        existing = set()
+        if auto_fields:
+            existing = set(model.objects.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list('pk', flat=True))
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+        inserted = []
+        for obj, record in zip(objects, chunk):
+            if obj.pk not in existing:
+                for field in auto_fields:
+                    setattr(obj, field, record['fields'][field])
+                inserted.append(obj)
+        if auto_fields and inserted:
+            model.objects.bulk_update(inserted, auto_fields)
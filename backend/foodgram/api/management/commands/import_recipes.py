@@ -0,0 +1,168 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate_shopping_carts
+from api.importers import Progress, chunked, read_records
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+                            Tag)
+from users.models import User
+
+RECIPE_FIELDS = ('text', 'cooking_time', 'image')
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует рецепты из JSON или NDJSON. Рецепт определяется '
+        'автором (username) и названием: существующие рецепты обновляются, '
+        'поэтому повторный запуск не создаёт дубликатов. Формат записи: '
+        '{"author", "name", "text", "cooking_time", "image", "tags": [slug], '
+        '"ingredients": [{"name", "measurement_unit", "amount"}]}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, batch_size, **options):
+        progress = Progress(self.stdout, 'Рецепты')
+        self.created = self.updated = self.skipped = 0
+        for chunk in chunked(read_records(path), batch_size):
+            with transaction.atomic():
+                self.import_chunk(chunk)
+            progress.update(len(chunk))
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано рецептов: {self.created}, обновлено: {self.updated}, '
+            f'пропущено: {self.skipped} ({progress.rate:.0f} строк/с)'))
+
+    def import_chunk(self, records):
+        authors = User.objects.in_bulk(
+            {record['author'] for record in records}, field_name='username')
+        tags = Tag.objects.in_bulk(
+            {slug for record in records for slug in record['tags']},
+            field_name='slug')
+        ingredients = {
+            (ingredient.name, ingredient.measurement_unit): ingredient.pk
+            for ingredient in Ingredient.objects.filter(name__in={
+                item['name'] for record in records
+                for item in record['ingredients']
+            })
+        }
+        # Последняя запись с тем же автором и названием побеждает.
+        parsed = {}
+        for record in records:
+            author = authors.get(record['author'])
+            try:
+                recipe_tags = [tags[slug].pk for slug in record['tags']]
+                amounts = {
+                    ingredients[(item['name'], item['measurement_unit'])]:
+                        int(item['amount'])
+                    for item in record['ingredients']
+                }
+            except KeyError as error:
+                self.stderr.write(
+                    f'Рецепт «{record["name"]}» пропущен: '
+                    f'не найдено {error}')
+                self.skipped += 1
+                continue
+            if author is None:
+                self.stderr.write(
+                    f'Рецепт «{record["name"]}» пропущен: '
+                    f'нет автора {record["author"]}')
+                self.skipped += 1
+                continue
+            parsed[(author.pk, record['name'])] = (
+                record, set(recipe_tags), amounts)
+        if not parsed:
+            return
+        recipes = self.save_recipes(parsed)
+        self.save_tags(recipes, parsed)
+        self.save_ingredients(recipes, parsed)
+
+    def get_existing(self, keys):
+        return {
+            (recipe.author_id, recipe.name): recipe
+            for recipe in Recipe.objects.filter(
+                author__in={author for author, _ in keys},
+                name__in={name for _, name in keys}
+            )
+            if (recipe.author_id, recipe.name) in keys
+        }
+
+    def save_recipes(self, parsed):
+        existing = self.get_existing(parsed.keys())
+        new_recipes = []
+        for key, (record, _, _) in parsed.items():
+            recipe = existing.get(key)
+            if recipe is None:
+                recipe = Recipe(author_id=key[0], name=key[1])
+                new_recipes.append(recipe)
+            for field in RECIPE_FIELDS:
+                setattr(recipe, field, record[field])
+        Recipe.objects.bulk_update(existing.values(), RECIPE_FIELDS)
+        Recipe.objects.bulk_create(new_recipes)
+        self.created += len(new_recipes)
+        self.updated += len(existing)
+        # bulk_create минует сигналы: счётчики и кэши обновляются здесь.
+        for author_id, count in Counter(
+                recipe.author_id for recipe in new_recipes).items():
+            User.objects.filter(pk=author_id).change_counter(
+                'recipes_count', count)
+        if existing:
+            user_ids = list(ShoppingCart.objects.filter(
+                recipe__in=existing.values()
+            ).values_list('user_id', flat=True).distinct())
+            if user_ids:
+                transaction.on_commit(
+                    lambda: invalidate_shopping_carts(user_ids))
+        if new_recipes and new_recipes[0].pk is None:
+            # Без RETURNING (SQLite) первичные ключи нужно перечитать.
+            return self.get_existing(parsed.keys())
+        existing.update(
+            ((recipe.author_id, recipe.name), recipe)
+            for recipe in new_recipes
+        )
+        return existing
+
+    def save_tags(self, recipes, parsed):
+        through = Recipe.tags.through
+        recipe_ids = [recipe.pk for recipe in recipes.values()]
+        through.objects.filter(recipe_id__in=recipe_ids).delete()
+        through.objects.bulk_create([
+            through(recipe_id=recipe.pk, tag_id=tag_id)
+            for key, recipe in recipes.items()
+            for tag_id in parsed[key][1]
+        ])
+
+    def save_ingredients(self, recipes, parsed):
+        """Сравнивает ингредиенты с базой и меняет только отличия."""
+        current = {
+            (item.recipe_id, item.ingredient_id): item
+            for item in RecipeIngredient.objects.filter(
+                recipe__in=recipes.values())
+        }
+        wanted = {
+            (recipe.pk, ingredient_id): amount
+            for key, recipe in recipes.items()
+            for ingredient_id, amount in parsed[key][2].items()
+        }
+        changed = []
+        for key, item in current.items():
+            amount = wanted.get(key)
+            if amount is not None and amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        removed = [
+            item.pk for key, item in current.items() if key not in wanted
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=recipe_id, ingredient_id=ingredient_id,
+                amount=amount)
+            for (recipe_id, ingredient_id), amount in wanted.items()
+            if (recipe_id, ingredient_id) not in current
+        ])
@@ -0,0 +1,81 @@
+import csv
+import io
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.cache import bump_data_version
+from api.importers import Progress, chunked, read_records
+from recipes.models import Ingredient
+
+FIELDS = ('name', 'measurement_unit')
+
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из CSV, JSON или NDJSON. Ингредиенты, '
+            'которые уже есть в базе (по названию и единице измерения), '
+            'пропускаются, поэтому команду можно запускать повторно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, path, batch_size, **options):
+        if connection.vendor == 'postgresql':
+            load = self.copy_chunk
+        else:
+            self.existing = set(
+                Ingredient.objects.values_list(*FIELDS).iterator())
+            load = self.bulk_create_chunk
+        progress = Progress(self.stdout, 'Ингредиенты')
+        created = 0
+        records = read_records(path, fieldnames=FIELDS)
+        for chunk in chunked(records, batch_size):
+            rows = {
+                (record['name'].strip(), record['measurement_unit'].strip())
+                for record in chunk
+            }
+            with transaction.atomic():
+                created += load(rows)
+            progress.update(len(chunk))
+        if created:
+            bump_data_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено ингредиентов: {created} из {progress.rows} '
+            f'({progress.rate:.0f} строк/с)'))
+
+    def bulk_create_chunk(self, rows):
+        new_rows = rows - self.existing
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in new_rows],
+            batch_size=1000
+        )
+        self.existing |= new_rows
+        return len(new_rows)
+
+    def copy_chunk(self, rows):
+        """Загружает порцию через COPY во временную таблицу."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_import (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT name, measurement_unit FROM ingredient_import i '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {table} t '
+                f'WHERE t.name = i.name '
+                f'AND t.measurement_unit = i.measurement_unit)'
+            )
+            return cursor.rowcount
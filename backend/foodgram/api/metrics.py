@@ -0,0 +1,111 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+from .profiling import QueryRecorder
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUESTS = Counter(
+    'foodgram_http_requests_total', 'Количество запросов к API.',
+    ('route', 'method', 'status')
+)
+REQUEST_DURATION = Histogram(
+    'foodgram_http_request_duration_seconds', 'Время обработки запроса.',
+    ('route', 'method')
+)
+DB_DURATION = Histogram(
+    'foodgram_db_query_duration_seconds',
+    'Суммарное время SQL-запросов за один HTTP-запрос.',
+    ('route',)
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries', 'Количество SQL-запросов за один HTTP-запрос.',
+    ('route',), buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+RESPONSE_SIZE = Histogram(
+    'foodgram_http_response_size_bytes', 'Размер тела ответа.',
+    ('route',), buckets=SIZE_BUCKETS
+)
+DB_CONNECTIONS = Counter(
+    'foodgram_db_connections_opened_total',
+    'Количество открытых соединений с базой данных.',
+    ('vendor',)
+)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.vendor).inc()
+
+
+def get_route(request):
+    # Имя маршрута, а не путь: иначе id рецептов раздуют число меток.
+    match = request.resolver_match
+    if match is None or not match.url_name:
+        return 'unresolved'
+    return match.url_name
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики запросов для /api/metrics.
+
+    Включается настройкой METRICS_ENABLED. При нескольких воркерах
+    Gunicorn нужно задать PROMETHEUS_MULTIPROC_DIR: тогда метрики
+    процессов пишутся в общий каталог и суммируются при выдаче.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        route = get_route(request)
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        REQUEST_DURATION.labels(route, request.method).observe(duration)
+        DB_DURATION.labels(route).observe(recorder.duration)
+        DB_QUERIES.labels(route).observe(recorder.count)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route).observe(len(response.content))
+        return response
+
+
+def has_metrics_access(request):
+    """Доступ по токену METRICS_TOKEN (Authorization: Bearer) и персоналу."""
+    if settings.METRICS_TOKEN and constant_time_compare(
+            request.headers.get('Authorization', ''),
+            f'Bearer {settings.METRICS_TOKEN}'):
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not has_metrics_access(request):
+        raise PermissionDenied
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
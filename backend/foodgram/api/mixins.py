@@ -0,0 +1,106 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from rest_framework.renderers import JSONRenderer
+
+from .cache import get_data_version
+
+RESPONSE_KEY = 'response:{}:{}:{}:{}?{}'
+
+
+class DataVersionCacheMixin:
+    """
+    Кэширует JSON-ответы справочников с ETag; ключ включает версию данных.
+    """
+    cache_timeout = 60 * 60 * 24
+    cache_max_age = 0
+    cache_query_params = ('name', 'format')
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        model = self.get_queryset().model
+        return RESPONSE_KEY.format(
+            model._meta.label_lower,
+            get_data_version(model),
+            request.accepted_media_type,
+            request.path,
+            urlencode(sorted(
+                (param, request.query_params[param])
+                for param in self.cache_query_params
+                if param in request.query_params
+            )),
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            content = response.rendered_content
+            cached = (
+                content,
+                response['Content-Type'],
+                quote_etag(hashlib.md5(content).hexdigest()),
+            )
+            cache.set(key, cached, self.cache_timeout)
+        content, content_type, etag = cached
+        response = get_conditional_response(
+            request, etag=etag,
+            response=HttpResponse(content, content_type=content_type))
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=self.cache_max_age,
+            must_revalidate=True)
+        return response
+
+
+class CursorPaginationMixin:
+    """
+    Включает курсорную пагинацию по параметру pagination=cursor.
+
+    Без параметра используется pagination_class, так что текущие клиенты
+    продолжают получать постраничные ответы. Курсор задаёт свою
+    сортировку, поэтому при параметрах из cursor_ordering_params,
+    меняющих порядок выдачи, тоже остаётся pagination_class.
+    """
+    cursor_pagination_class = None
+    cursor_ordering_params = ()
+    pagination_query_param = 'pagination'
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return (
+            self.cursor_pagination_class is not None
+            and params.get(self.pagination_query_param) == 'cursor'
+            and not any(params.get(param)
+                        for param in self.cursor_ordering_params)
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            pagination_class = self.pagination_class
+            if self.use_cursor_pagination():
+                pagination_class = self.cursor_pagination_class
+            if pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = pagination_class()
+        return self._paginator
@@ -1,5 +1,145 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (CursorPagination, PageNumberPagination,
+                                       _reverse_ordering)
+from rest_framework.response import Response
+
+
+def get_approximate_count(queryset):
+    """
+    Оценивает число строк по плану запроса PostgreSQL без COUNT(*).
+
+    Для других СУБД выполняется точный подсчёт.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по (publish_date, id) без OFFSET.
+
+    CursorPagination из DRF ищет позицию только по первому полю
+    сортировки и пропускает совпадающие значения через OFFSET. Здесь
+    позиция курсора включает все поля ordering, и страница начинается
+    условием (publish_date, id) < (%s, %s), так что OFFSET не нужен.
+    Ответ сохраняет форму CustomPageNumberPagination. Поле count
+    вычисляется по параметру count: exact — точно, approximate — по
+    оценке планировщика, по умолчанию не вычисляется (null).
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-publish_date', '-id')
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            self.count = queryset.count()
+        elif mode == 'approximate':
+            self.count = get_approximate_count(queryset)
+        else:
+            self.count = None
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_seek_condition(current_position, reverse))
+        # Позиции уникальны, так что offset в курсорах всегда 0.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+        has_following_position = following_position is not None
+        has_position = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = (
+                has_position, has_following_position)
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next, self.has_previous = (
+                has_following_position, has_position)
+            self.next_position = following_position
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_seek_condition(self, position, reverse):
+        """
+        Строки строго после позиции в порядке ordering.
+
+        Сравнение кортежей раскрывается в OR по полям; условие
+        на первое поле дублируется нестрогим, чтобы индекс по
+        (publish_date, id) начинал просмотр сразу с позиции.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = Q()
+        lookups = []
+        for field, value in zip(self.ordering, values):
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            name = field.lstrip('-')
+            lookups.append((name, lookup, value))
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        name, lookup, value = lookups[0]
+        return Q(**{f'{name}__{lookup}e': value}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class SubscriptionKeysetPagination(KeysetPagination):
+    ordering = ('id',)
@@ -0,0 +1,74 @@
+import os
+from functools import lru_cache
+
+import reportlab.rl_config
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+reportlab.rl_config.warnOnMissingFontGlyphs = 0
+
+FONT_NAME = 'DejaVuSans'
+FONT_PATH = os.path.join(
+    settings.BASE_DIR, 'static', 'fonts', 'DejaVuSans.ttf')
+
+
+@lru_cache(maxsize=None)
+def register_font(name=FONT_NAME, path=FONT_PATH):
+    """Регистрирует TTF шрифт один раз за время жизни процесса."""
+    pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+class ChunkStream(list):
+    """Файлоподобный объект, собирающий записанные куски в список."""
+
+    def write(self, data):
+        self.append(data)
+
+
+class PDFWriter:
+    """Выводит строки в PDF с переносом по ширине и разбиением на страницы."""
+
+    def __init__(self, stream, font_size=10, leading=20, margin=22,
+                 pagesize=A4):
+        self.font_name = register_font()
+        self.font_size = font_size
+        self.leading = leading
+        self.margin = margin
+        self.width, self.height = pagesize
+        self.canvas = canvas.Canvas(stream, pagesize=pagesize)
+        self.start_page()
+
+    def start_page(self):
+        self.canvas.setFont(self.font_name, self.font_size)
+        self.bottom = self.height - self.margin - self.font_size
+
+    def write_line(self, text):
+        max_width = self.width - 2 * self.margin
+        parts = simpleSplit(
+            text, self.font_name, self.font_size, max_width) or ['']
+        for part in parts:
+            if self.bottom < self.margin:
+                self.canvas.showPage()
+                self.start_page()
+            self.canvas.drawString(self.margin, self.bottom, part)
+            self.bottom -= self.leading
+
+    def write_lines(self, lines):
+        for line in lines:
+            self.write_line(line)
+
+    def save(self):
+        self.canvas.save()
+
+
+def render_pdf(lines, stream):
+    """Записывает строки в PDF прямо в stream (например, HttpResponse)."""
+    writer = PDFWriter(stream)
+    writer.write_lines(lines)
+    writer.save()
+    return stream
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict, deque
+from threading import Lock
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return None
+    index = max(0, int(round(percent / 100 * len(values))) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class ProfileBuffer:
+    """Кольцевые буферы последних замеров для каждого представления."""
+
+    def __init__(self, size):
+        self.lock = Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+
+    def add(self, key, wall_ms, db_ms, queries):
+        with self.lock:
+            self.samples[key].append((wall_ms, db_ms, queries))
+
+    def report(self):
+        """Сводка по представлениям, самые медленные по p95 — первыми."""
+        with self.lock:
+            snapshot = {key: list(items) for key, items in
+                        self.samples.items()}
+        report = []
+        for key, items in snapshot.items():
+            wall = sorted(item[0] for item in items)
+            db = sorted(item[1] for item in items)
+            queries = sorted(item[2] for item in items)
+            report.append({
+                'view': key,
+                'samples': len(items),
+                'wall_ms': {
+                    'p50': percentile(wall, 50),
+                    'p95': percentile(wall, 95),
+                    'p99': percentile(wall, 99),
+                },
+                'db_ms': {
+                    'p50': percentile(db, 50),
+                    'p95': percentile(db, 95),
+                },
+                'queries': {
+                    'p50': percentile(queries, 50),
+                    'max': queries[-1],
+                },
+            })
+        report.sort(key=lambda item: item['wall_ms']['p95'], reverse=True)
+        return report
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+profile_buffer = ProfileBuffer(settings.PROFILING_BUFFER_SIZE)
+
+
+class QueryRecorder:
+    """execute_wrapper, считающий запросы, их время и повторы."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            # Параметры передаются отдельно, поэтому текст SQL
+            # одинаков у запросов, различающихся только значениями.
+            self.statements[sql] += 1
+
+    def get_duplicates(self):
+        return [
+            {
+                'fingerprint': hashlib.md5(sql.encode()).hexdigest()[:12],
+                'count': count,
+                'sql': sql[:200],
+            }
+            for sql, count in self.statements.most_common()
+            if count > 1
+        ]
+
+
+def get_view_key(request):
+    match = request.resolver_match
+    if match is None:
+        return f'{request.method} <unresolved>'
+    return f'{request.method} {match.view_name}'
+
+
+class ProfilingMiddleware:
+    """
+    Замеряет число SQL-запросов, время в БД и общее время запроса.
+
+    Включается настройкой PROFILING_ENABLED и обрабатывает долю
+    запросов PROFILING_SAMPLE_RATE. Результат пишется в лог
+    api.profiling, в заголовок Server-Timing и в кольцевой буфер,
+    сводку по которому отдаёт /api/profiling/.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+        key = get_view_key(request)
+        profile_buffer.add(
+            key, round(wall_ms, 1), round(db_ms, 1), recorder.count)
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f'total;dur={wall_ms:.1f}'
+        )
+        logger.info(json.dumps({
+            'view': key,
+            'path': request.path,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 1),
+            'db_ms': round(db_ms, 1),
+            'queries': recorder.count,
+            'duplicates': recorder.get_duplicates(),
+        }, ensure_ascii=False))
+        return response
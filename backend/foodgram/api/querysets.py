@@ -0,0 +1,106 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (Exists, F, FloatField, OuterRef, Prefetch, Q,
+                              Subquery)
+from django.db.models.expressions import RawSQL
+
+from recipes.models import (Favorite, Recipe, RecipeIngredient, ShoppingCart,
+                            Tag)
+from recipes.search import FTS_TABLE, SEARCH_CONFIG, has_fts_table
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def annotate_is_subscribed(queryset, user):
+    """Аннотирует пользователей флагом подписки текущего пользователя."""
+    if user.is_anonymous:
+        return queryset
+    return queryset.annotate(
+        is_subscribed=Exists(Subscription.objects.filter(
+            author=OuterRef('pk'), subscriber=user))
+    )
+
+
+def get_recipes_for_read(user, queryset=None):
+    """
+    Формирует queryset рецептов для сериализации через RecipeSerializer.
+
+    Теги и ингредиенты подгружаются заранее, флаги is_favorited,
+    is_in_shopping_cart и is_subscribed автора вычисляются подзапросами
+    EXISTS, поэтому число запросов не зависит от количества рецептов.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    queryset = queryset.prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.all()),
+        Prefetch(
+            'recipeingredient_set',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        ),
+    )
+    if user.is_anonymous:
+        return queryset.select_related('author')
+    return queryset.prefetch_related(
+        Prefetch(
+            'author',
+            queryset=annotate_is_subscribed(User.objects.all(), user)
+        ),
+    ).annotate(
+        is_favorited=Exists(Favorite.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+    )
+
+
+def get_authors_with_recipes(queryset, recipes_limit=None):
+    """
+    Подготавливает авторов для SubscribtionUserSerializer.
+
+    Количество рецептов хранится в User.recipes_count, а последние
+    recipes_limit рецептов всех авторов страницы загружаются одним запросом:
+    коррелированный подзапрос с LIMIT отбирает id новейших рецептов
+    каждого автора.
+    """
+    recipes = Recipe.objects.all()
+    if recipes_limit is not None:
+        recipes = recipes.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).order_by('-publish_date', '-pk').values('pk')[:recipes_limit]
+        ))
+    return queryset.prefetch_related(
+        Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+    )
+
+
+def search_recipes(queryset, query):
+    """
+    Полнотекстовый поиск по названию и тексту рецепта.
+
+    Результаты аннотируются релевантностью rank и сортируются по ней.
+    Без PostgreSQL и FTS5 остаётся поиск по вхождению подстроки.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-publish_date', '-id')
+    if connection.vendor == 'sqlite' and has_fts_table(queryset.db):
+        words = re.findall(r'\w+', query)
+        if not words:
+            return queryset.none()
+        match = ' '.join(f'"{word}"*' for word in words)
+        # bm25 считается по соединению с FTS-таблицей (RecipeSearchIndex):
+        # коррелированный подзапрос на каждую строку в разы медленнее.
+        return queryset.filter(search_index__document__match=match).annotate(
+            rank=RawSQL(f'-bm25({FTS_TABLE}, 10.0, 1.0)', (),
+                        output_field=FloatField())
+        ).order_by('-rank', '-publish_date', '-id')
+    return queryset.filter(Q(name__icontains=query) | Q(text__icontains=query))
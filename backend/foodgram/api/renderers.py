@@ -0,0 +1,93 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from .pdf import ChunkStream, render_pdf
+
+
+def get_shopping_list_lines(rows):
+    """Формирует строки списка покупок из агрегированных ингредиентов."""
+    yield 'Не забыть купить:'
+    for row in rows:
+        yield (
+            f'{row["name"]} '
+            f'{row["amount_sum"]} '
+            f'{row["measurement_unit"]} '
+        )
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: writerow возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+
+    Метод stream отдаёт файл по частям по мере чтения строк из БД
+    (для StreamingHttpResponse), render собирает их целиком.
+    Ошибки рендерит JSONRenderer (см. RecipeViewSet.finalize_response).
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(
+            chunk.encode(self.charset) if isinstance(chunk, str) else chunk
+            for chunk in self.stream(data)
+        )
+
+    def stream(self, rows):
+        raise NotImplementedError
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def stream(self, rows):
+        # reportlab собирает документ целиком и пишет его при save().
+        yield from render_pdf(get_shopping_list_lines(rows), ChunkStream())
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        for line in get_shopping_list_lines(rows):
+            yield f'{line}\n'
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for row in rows:
+            yield writer.writerow(
+                (row['name'], row['amount_sum'], row['measurement_unit']))
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, rows):
+        yield '['
+        for index, row in enumerate(rows):
+            if index:
+                yield ','
+            yield json.dumps({
+                'id': row['ingredient_id'],
+                'name': row['name'],
+                'measurement_unit': row['measurement_unit'],
+                'amount': row['amount_sum'],
+            }, ensure_ascii=False)
+        yield ']'
@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .fields import PrimaryKeyListField
+from .images import StreamingBase64ImageField, get_thumbnail_url
+from .querysets import get_recipes_for_read
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
 from users.models import Subscription
@@ -14,14 +18,17 @@ class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
-        fields = ('email', 'username', 'first_name',
-                  'last_name', 'id', 'password', 'is_subscribed')
+        fields = ('email', 'username', 'first_name', 'last_name', 'id',
+                  'password', 'is_subscribed', 'subscribers_count')
         model = User
         extra_kwargs = {'password': {'write_only': True}}
+        read_only_fields = ('subscribers_count',)
 
     def get_is_subscribed(self, obj):
         if self.context['request'].user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscription.objects.filter(
             author=obj, subscriber=self.context['request'].user).exists()
 
@@ -34,12 +41,20 @@ class CustomCreateUserSerializer(UserCreateSerializer):
                   'last_name', 'id', 'password')
 
 
-class SubscribtionRecipeSerializer(serializers.ModelSerializer):
+class RecipeThumbnailMixin(serializers.Serializer):
+    thumbnail = serializers.SerializerMethodField()
+
+    def get_thumbnail(self, obj):
+        return get_thumbnail_url(obj, self.context.get('request'))
+
+
+class SubscribtionRecipeSerializer(RecipeThumbnailMixin,
+                                   serializers.ModelSerializer):
     image = Base64ImageField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail', 'cooking_time')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -91,28 +106,57 @@ class RecipeSerializer(serializers.ModelSerializer):
     def get_is_favorited(self, obj):
         if self.context['request'].user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return Favorite.objects.filter(
             user=self.context['request'].user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         if self.context['request'].user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return ShoppingCart.objects.filter(
             user=self.context['request'].user, recipe=obj).exists()
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """Загружает все ингредиенты рецепта одним запросом."""
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = PrimaryKeyListField(
+            queryset=Ingredient.objects.all(),
+            error_messages={
+                'unique': 'Ингредиенты должны быть уникальными',
+                'does_not_exist': 'Ингредиенты не найдены: {pk_list}.',
+            }
+        ).to_internal_value([item['id'] for item in items])
+        for item, ingredient in zip(items, ingredients):
+            item['id'] = ingredient
+        return items
+
+
 class CreateRecipeIngredientSerializer(serializers.Serializer):
     amount = serializers.IntegerField()
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         fields = ('id', 'amount')
         model = Ingredient
+        list_serializer_class = RecipeIngredientListSerializer
 
 
 class WriteRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
     ingredients = CreateRecipeIngredientSerializer(many=True)
+    tags = PrimaryKeyListField(
+        queryset=Tag.objects.all(),
+        error_messages={
+            'unique': 'Тэги должны быть уникальными!',
+            'does_not_exist': 'Тэги не найдены: {pk_list}.',
+        }
+    )
 
     class Meta:
         fields = ('id', 'name', 'image', 'ingredients',
@@ -125,38 +169,31 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Список ингредиентов не может быть пустым'
             )
-        ingredient_list = []
-        for ingredient_item in ingredients:
-            ingredient = ingredient_item.get('id')
-            if ingredient in ingredient_list:
-                raise serializers.ValidationError('Ингредиенты должны '
-                                                  'быть уникальными')
-            ingredient_list.append(ingredient)
-            amount = ingredient_item.get('amount')
-            if int(amount) <= 0:
-                raise serializers.ValidationError('Проверьте, что количество'
-                                                  'ингредиента больше нуля')
-        tags = data.get('tags')
-        if not tags:
+        if any(item['amount'] <= 0 for item in ingredients):
+            raise serializers.ValidationError('Проверьте, что количество '
+                                              'ингредиента больше нуля')
+        if not data.get('tags'):
             raise serializers.ValidationError({
                 'tags': 'Нужно выбрать хотя бы один тэг!'
             })
-        tags_list = []
-        for tag in tags:
-            if tag in tags_list:
-                raise serializers.ValidationError({
-                    'tags': 'Тэги должны быть уникальными!'
-                })
-            tags_list.append(tag)
-
-        cooking_time = data.get('cooking_time')
-        if int(cooking_time) <= 0:
+        if data.get('cooking_time', 0) <= 0:
             raise serializers.ValidationError({
                 'cooking_time': 'Время приготовление должно быть больше нуля!'
             })
         return data
 
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get('image')
+            if image is not None:
+                # Временный файл уже перемещён хранилищем.
+                image.close()
+
     def create_ingredients_amount(self, recipe, ingredients):
+        if not ingredients:
+            return
         RecipeIngredient.objects.bulk_create(
             [RecipeIngredient(
                 ingredient=ingredient['id'],
@@ -164,6 +201,7 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
                 amount=ingredient['amount']
             )for ingredient in ingredients])
 
+    @transaction.atomic
     def create(self, validated_data):
         pop_ingredients = validated_data.pop('ingredients')
         pop_tags = validated_data.pop('tags')
@@ -173,50 +211,90 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
         self.create_ingredients_amount(recipe, pop_ingredients)
         return recipe
 
+    def update_ingredients_amount(self, recipe, ingredients):
+        """
+        Приводит ингредиенты рецепта к новому списку.
+
+        Неизменившиеся строки не трогаются: меняются только
+        количества, добавленные и удалённые ингредиенты.
+        """
+        amounts = {item['id'].pk: item['amount'] for item in ingredients}
+        current = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+        self.create_ingredients_amount(recipe, [
+            item for item in ingredients if item['id'].pk not in current
+        ])
+
+    @transaction.atomic
     def update(self, recipe, validated_data):
         pop_ingredients = validated_data.pop('ingredients')
         pop_tags = validated_data.pop('tags')
         super().update(recipe, validated_data)
-        recipe.ingredients.clear()
-        recipe.tags.clear()
-        self.create_ingredients_amount(recipe, pop_ingredients)
         recipe.tags.set(pop_tags)
+        self.update_ingredients_amount(recipe, pop_ingredients)
         return recipe
 
     def to_representation(self, instance):
-        return RecipeSerializer(instance, context=self.context).data
+        recipe = get_recipes_for_read(
+            self.context['request'].user).get(pk=instance.pk)
+        return RecipeSerializer(recipe, context=self.context).data
 
 
 class SubscribtionUserSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
     is_subscribed = serializers.BooleanField(default=True)
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
+    subscribers_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         fields = ('id', 'email', 'username', 'first_name', 'last_name',
-                  'is_subscribed', 'recipes_count', 'recipes')
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+                  'is_subscribed', 'recipes_count', 'subscribers_count',
+                  'recipes')
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        recipes_limit = request.query_params.get(
-            'recipes_limit', obj.recipes.count())
-        recipes = Recipe.objects.filter(
-            author=obj).all()[:(int(recipes_limit))]
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = request.query_params.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:int(recipes_limit)]
         context = {'request': request}
         return SubscribtionRecipeSerializer(
             recipes, many=True, context=context).data
 
 
-class FavoriteRecipeSerializer(serializers.ModelSerializer):
+class FavoriteRecipeSerializer(RecipeThumbnailMixin,
+                               serializers.ModelSerializer):
     image = Base64ImageField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail', 'cooking_time')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=200
+    )
 
 
 class ShoppingCartRecipeSerializer(FavoriteRecipeSerializer):
@@ -224,4 +302,4 @@ class ShoppingCartRecipeSerializer(FavoriteRecipeSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail', 'cooking_time')
@@ -1,74 +1,100 @@
-import io
-
-import reportlab.rl_config
-from django.db.models import Q, Sum
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Sum
 from rest_framework import status, viewsets
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from .serializers import FavoriteRecipeSerializer, ShoppingCartRecipeSerializer
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart)
-
-
-def get_pdf_file(content: list):
-    """Из строк списка формирует PDF file."""
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer)
-    reportlab.rl_config.warnOnMissingFontGlyphs = 0
-    pdfmetrics.registerFont(
-        TTFont('DejaVuSans', 'static/fonts/DejaVuSans.ttf')
-    )
-    c.setFont('DejaVuSans', 10)
-    bottom = 800
-    for string in content:
-        c.drawString(22, bottom, string)
-        bottom -= 20
-    c.save()
-    buffer.seek(0)
-    return buffer
+from .serializers import (FavoriteRecipeSerializer, RecipeIdsSerializer,
+                          ShoppingCartRecipeSerializer)
+from recipes.models import (RECIPE_COUNTERS, Favorite, Recipe,
+                            RecipeIngredient, ShoppingCart)
+
+User = get_user_model()
+
+
+def lock_user(user):
+    """
+    Блокирует строку пользователя до конца транзакции.
+
+    Сериализует массовые добавления одного пользователя, чтобы SELECT
+    уже добавленных записей и INSERT видели одно и то же состояние.
+    """
+    list(User.objects.select_for_update().filter(
+        pk=user.pk).values_list('pk', flat=True))
+
+
+def get_shopping_cart_ingredients(user):
+    """
+    Суммирует ингредиенты рецептов из списка покупок пользователя.
+
+    Один запрос с GROUP BY по ингредиенту; строки отдаются итератором,
+    без загрузки всего результата в память.
+    """
+    return RecipeIngredient.objects.filter(
+        recipe__in=ShoppingCart.objects.filter(user=user).values('recipe')
+    ).values(
+        'ingredient_id',
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).annotate(
+        amount_sum=Sum('amount')
+    ).order_by('name').iterator()
 
 
 class ViewsetForRecipes(viewsets.ModelViewSet):
     """Вюсет для модели Recipe."""
 
-    def get_shopping_cart_content(self, request, pk=None):
-        """Формирует контент с ингредиентами для списка покупок."""
-        file_content = ['Не забыть купить:']
-        recipes = Recipe.objects.filter(shoppingcart__user=request.user)
-        recipes_with_ingredients = RecipeIngredient.objects.filter(
-            recipe__in=recipes)
-        ingredients = Ingredient.objects.filter(
-            recipeingredient__in=recipes_with_ingredients
-        ).distinct()
-        summed_amount_ingredients = ingredients.annotate(
-            amount_sum=Sum(
-                'recipeingredient__amount', filter=Q(
-                    recipeingredient__in=recipes_with_ingredients
-                )))
-        for ingredient in summed_amount_ingredients.all():
-            file_content.append(
-                f'{ingredient.name} '
-                f'{ingredient.amount_sum} '
-                f'{ingredient.measurement_unit} '
-            )
-        return file_content
-
     def add_recipe_to_shopping_or_favorite(
             self, model, serializer, request, recipe=None,):
-        if model.objects.filter(
-                recipe=recipe, user=request.user).exists():
+        try:
+            with transaction.atomic():
+                model.objects.create(user=request.user, recipe=recipe)
+        except IntegrityError:
             return Response(
                 'Запись уже существует.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        model.objects.create(user=request.user, recipe=recipe)
-        serializer = serializer(recipe)
+        serializer = serializer(recipe, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def add_recipes_to_shopping_or_favorite(self, model, request):
+        """
+        Добавляет несколько рецептов за один INSERT под lock_user.
+
+        Возвращает статус для каждого id: created, exists или not_found.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        with transaction.atomic():
+            lock_user(request.user)
+            recipes = dict(Recipe.objects.filter(pk__in=recipe_ids).annotate(
+                is_added=Exists(model.objects.filter(
+                    user=request.user, recipe=OuterRef('pk')))
+            ).values_list('pk', 'is_added'))
+            new_ids = [pk for pk, is_added in recipes.items() if not is_added]
+            model.objects.bulk_create(
+                [model(user=request.user, recipe_id=pk) for pk in new_ids],
+                ignore_conflicts=True
+            )
+            # bulk_create не отправляет сигналы счётчиков.
+            Recipe.objects.filter(pk__in=new_ids).change_counter(
+                RECIPE_COUNTERS[model], 1)
+        results = []
+        for pk in recipe_ids:
+            if pk not in recipes:
+                result = 'not_found'
+            elif recipes[pk]:
+                result = 'exists'
+            else:
+                result = 'created'
+            results.append({'id': pk, 'status': result})
+        return Response(
+            {'results': results},
+            status=status.HTTP_201_CREATED if new_ids else status.HTTP_200_OK
+        )
+
     def add_recipe_to_user_shopping_cart(self, request, recipe=None, pk=None):
         """Добавляет рецепт в список покупок."""
         return self.add_recipe_to_shopping_or_favorite(
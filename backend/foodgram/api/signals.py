@@ -0,0 +1,108 @@
+from threading import local
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens, invalidate_user_tokens
+from .cache import bump_data_version, invalidate_shopping_carts
+from .images import schedule_thumbnail
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+                            Tag)
+
+User = get_user_model()
+pending = local()
+
+
+def invalidate_on_commit(user_ids):
+    """Сбрасывает кэш списков покупок после фиксации транзакции."""
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_shopping_carts(user_ids))
+
+
+def get_cart_users(**recipe_lookup):
+    return ShoppingCart.objects.filter(
+        **recipe_lookup).values_list('user_id', flat=True).distinct()
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.user_id])
+
+
+def invalidate_pending_recipes():
+    recipe_ids = getattr(pending, 'recipe_ids', None)
+    if recipe_ids:
+        pending.recipe_ids = set()
+        invalidate_shopping_carts(get_cart_users(recipe_id__in=recipe_ids))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def recipe_ingredient_saved(sender, instance, **kwargs):
+    """
+    Правка ингредиентов в админке; API меняет их bulk-операциями.
+
+    Рецепты копятся до конца транзакции и проверяются одним запросом.
+    post_delete не подключён: он отключил бы быстрое удаление строк,
+    а удаление рецепта и так сбрасывает корзины каскадом ShoppingCart.
+    """
+    if not hasattr(pending, 'recipe_ids'):
+        pending.recipe_ids = set()
+    pending.recipe_ids.add(instance.recipe_id)
+    transaction.on_commit(invalidate_pending_recipes)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    """Ингредиенты рецепта обновляются через bulk_create без сигналов."""
+    if not created:
+        invalidate_on_commit(get_cart_users(recipe_id=instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, raw, **kwargs):
+    if instance.image and not raw:
+        recipe_id, image_name = instance.pk, instance.image.name
+        transaction.on_commit(
+            lambda: schedule_thumbnail(recipe_id, image_name))
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_ingredients_changed(sender, instance, action, reverse, **kwargs):
+    if action.startswith('post_') and not reverse:
+        invalidate_on_commit(get_cart_users(recipe_id=instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_on_commit(get_cart_users(
+            recipe__recipeingredient__ingredient_id=instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reference_data_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_data_version(sender))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Выход через djoser token/logout удаляет токен."""
+    keys = [instance.key]
+    transaction.on_commit(lambda: invalidate_tokens(keys))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, raw, **kwargs):
+    """В кэше токенов лежит объект пользователя, например is_active."""
+    if raw:
+        return
+    user_ids = [instance.pk]
+    transaction.on_commit(lambda: invalidate_user_tokens(user_ids))
@@ -3,8 +3,9 @@ from django.urls import path
 from django.views.generic import TemplateView
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
-from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                    TagViewSet)
+from .metrics import metrics_view
+from .views import (CustomUserViewSet, IngredientViewSet, ProfilingReportView,
+                    RecipeViewSet, TagViewSet)
 
 router = SimpleRouter()
 user_router = DefaultRouter()
@@ -17,6 +18,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('', include(user_router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics', metrics_view, name='metrics'),
+    path('profiling/', ProfilingReportView.as_view(), name='profiling'),
     path(
         'docs/',
         TemplateView.as_view(template_name='redoc.html'),
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.http import FileResponse
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.permissions import CurrentUserOrAdmin
 from djoser.views import UserViewSet
@@ -7,27 +10,51 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .autocomplete import ingredient_index
+from .cache import get_shopping_cart_etag, invalidate_shopping_carts
 from .filters import IngredientFilter, RecipeFilter
-from .paginators import CustomPageNumberPagination
+from .mixins import CursorPaginationMixin, DataVersionCacheMixin
+from .paginators import (CustomPageNumberPagination, KeysetPagination,
+                         SubscriptionKeysetPagination)
 from .permissions import RecipePermissions, UserPermissions
-from .serializers import (IngredientSerializer, SubscribtionUserSerializer,
-                          TagSerializer, UserSerializer, WriteRecipeSerializer)
-from .services import ViewsetForRecipes, get_pdf_file
+from .profiling import profile_buffer
+from .querysets import (annotate_is_subscribed, get_authors_with_recipes,
+                        get_recipes_for_read)
+from .renderers import (CSVShoppingListRenderer, JSONShoppingListRenderer,
+                        PDFShoppingListRenderer, ShoppingListRenderer,
+                        TextShoppingListRenderer)
+from .serializers import (IngredientSerializer, RecipeSerializer,
+                          SubscribtionUserSerializer, TagSerializer,
+                          UserSerializer, WriteRecipeSerializer)
+from .services import ViewsetForRecipes, get_shopping_cart_ingredients
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
 from users.models import Subscription
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
     permission_classes = (UserPermissions,)
     pagination_class = CustomPageNumberPagination
 
+    def get_queryset(self):
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user)
+
+    def get_recipes_limit(self):
+        """Возвращает значение recipes_limit из запроса или None."""
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit is None or not recipes_limit.isdigit():
+            return None
+        return int(recipes_limit)
+
     @action(["get", ], permission_classes=(CurrentUserOrAdmin,), detail=False)
     def me(self, request, *args, **kwargs):
         self.get_object = self.get_instance
@@ -36,13 +63,16 @@ class CustomUserViewSet(UserViewSet):
     @action(
         detail=False, methods=['get'],
         pagination_class=CustomPageNumberPagination,
+        cursor_pagination_class=SubscriptionKeysetPagination,
         permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request):
-        authors = User.objects.filter(
-            subscription_authors__subscriber=request.user
-        ).prefetch_related('subscribers'
-                           ).prefetch_related('recipes').all()
+        authors = get_authors_with_recipes(
+            User.objects.filter(
+                subscription_authors__subscriber=request.user
+            ).order_by('id'),
+            self.get_recipes_limit()
+        )
         queryset = self.filter_queryset(authors)
         page = self.paginate_queryset(queryset)
 
@@ -64,7 +94,8 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscribe(self, request, id=None):
         try:
-            author = User.objects.prefetch_related('recipes').get(id=id)
+            author = get_authors_with_recipes(
+                User.objects.all(), self.get_recipes_limit()).get(id=id)
         except User.DoesNotExist:
             raise NotFound(
                 detail={'Подписки': 'Автор не существует.'}, code=404)
@@ -81,7 +112,11 @@ class CustomUserViewSet(UserViewSet):
                     'Подписка уже существует.',
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            Subscription.objects.create(subscriber=request.user, author=author)
+            with transaction.atomic():
+                Subscription.objects.create(
+                    subscriber=request.user, author=author)
+            # Сигнал увеличил счётчик в базе, а не у загруженного автора.
+            author.subscribers_count += 1
             response_data = SubscribtionUserSerializer(
                 author, context={'request': request}).data
             return Response(response_data, status=status.HTTP_201_CREATED)
@@ -98,7 +133,8 @@ class CustomUserViewSet(UserViewSet):
             )
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(DataVersionCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     pagination_class = None
@@ -106,38 +142,92 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по name обслуживается индексом в памяти процесса."""
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(self.search, request, name)
+
+    def search(self, request, name):
+        serializer = self.get_serializer(
+            ingredient_index.search(name), many=True)
+        return Response(serializer.data)
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(DataVersionCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
     pagination_class = None
     permission_classes = (AllowAny,)
 
 
-class RecipeViewSet(ViewsetForRecipes):
+class RecipeViewSet(CursorPaginationMixin, ViewsetForRecipes):
     serializer_class = WriteRecipeSerializer
     queryset = Recipe.objects.all()
     permission_classes = (RecipePermissions,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = KeysetPagination
+    cursor_ordering_params = ('search', 'ordering')
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return get_recipes_for_read(self.request.user)
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve'):
+            return RecipeSerializer
+        return super().get_serializer_class()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Ошибки при выгрузке списка покупок отдаются в JSON, а не файлом."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if (isinstance(response, Response)
+                and not status.is_success(response.status_code)
+                and isinstance(response.accepted_renderer,
+                               ShoppingListRenderer)):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
 
     @action(
         detail=False,
         methods=['get', ],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=(
+            PDFShoppingListRenderer, TextShoppingListRenderer,
+            CSVShoppingListRenderer, JSONShoppingListRenderer
+        )
     )
     def download_shopping_cart(self, request, pk=None):
         """
-        Формирует и отправляет PDF файл.
+        Формирует и отправляет файл со списком покупок.
 
         С ингридиентами и их количеством в рецептах добавленных список покупок.
+        Формат (pdf, txt, csv, json) выбирается параметром format или
+        заголовком Accept. Ответ снабжается ETag, для неизменённой корзины
+        возвращается 304 без запроса к БД. Иначе строки агрегирующего
+        запроса отдаются потоком, не накапливаясь в памяти.
         """
-        file_content = self.get_shopping_cart_content(request)
-        return FileResponse(
-            get_pdf_file(file_content),
-            as_attachment=True,
-            filename='ShoppingCart.pdf')
+        renderer = request.accepted_renderer
+        etag = get_shopping_cart_etag(request.user)
+        etag = quote_etag(f'{etag}-{renderer.format}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            response = StreamingHttpResponse(
+                renderer.stream(get_shopping_cart_ingredients(request.user)),
+                content_type=content_type)
+            response['Content-Disposition'] = (
+                f'attachment; filename="ShoppingCart.{renderer.format}"')
+        response['ETag'] = etag
+        return response
 
     @action(
         detail=True,
@@ -154,6 +244,19 @@ class RecipeViewSet(ViewsetForRecipes):
             return self.remove_recipe_to_shopping_or_favorite(
                 ShoppingCart, request, recipe=recipe)
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        """Добавляет в список покупок несколько рецептов за один запрос."""
+        response = self.add_recipes_to_shopping_or_favorite(
+            ShoppingCart, request)
+        invalidate_shopping_carts([request.user.pk])
+        return response
+
     @action(detail=True, methods=['post', 'delete'])
     def favorite(self, request, pk=None):
         """Добавляет и удаляет запись в модели Favorite."""
@@ -165,3 +268,25 @@ class RecipeViewSet(ViewsetForRecipes):
         if request.method == 'DELETE':
             return self.remove_recipe_to_shopping_or_favorite(
                 Favorite, request, recipe=recipe)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='favorite',
+        url_name='favorite-bulk'
+    )
+    def favorite_bulk(self, request):
+        """Добавляет в избранное несколько рецептов за один запрос."""
+        return self.add_recipes_to_shopping_or_favorite(Favorite, request)
+
+
+class ProfilingReportView(APIView):
+    """Сводка ProfilingMiddleware: перцентили времени и число запросов."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(profile_buffer.report())
+
+    def delete(self, request):
+        profile_buffer.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,45 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с проверкой постоянных соединений.
+
+    Аналог CONN_HEALTH_CHECKS из Django 4.1: close_old_connections
+    в начале и конце запроса снимает отметку о проверке, и при первом
+    обращении к БД в запросе соединение, закрытое сервером или пулером,
+    заменяется новым вместо ошибки в представлении. Запрос, который
+    не обращается к БД, проверку не выполняет.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False)
+        self.health_check_done = False
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        self.health_check_done = True
+        return connection
+
+    def close_if_health_check_failed(self):
+        if (self.connection is None or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        if self.connection is not None:
+            self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def set_autocommit(self, *args, **kwargs):
+        self.close_if_health_check_failed()
+        return super().set_autocommit(*args, **kwargs)
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
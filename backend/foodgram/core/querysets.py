@@ -0,0 +1,63 @@
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    """Число записей model, ссылающихся полем field на внешнюю строку."""
+    related = model.objects.filter(**{field: models.OuterRef('pk')})
+    return Coalesce(models.Subquery(
+        related.order_by().values(field).annotate(
+            total=models.Count('pk')).values('total'),
+        output_field=models.IntegerField()
+    ), 0)
+
+
+class CounterQuerySet(models.QuerySet):
+
+    def change_counter(self, field, delta):
+        """Атомарно изменяет денормализованный счётчик выражением F()."""
+        queryset = self
+        if delta < 0:
+            queryset = queryset.filter(**{f'{field}__gte': -delta})
+        return queryset.update(**{field: models.F(field) + delta})
+
+    def recount(self, counters, batch_size=1000):
+        """
+        Сверяет счётчики с фактическим числом связанных записей.
+
+        counters сопоставляет полю счётчика пару (модель, поле связи).
+        Строки обрабатываются пачками под блокировкой, расходящиеся
+        счётчики исправляются через bulk_update. Возвращает число
+        проверенных и исправленных строк.
+        """
+        fields = list(counters)
+        annotations = {
+            f'actual_{field}': count_subquery(model, related_field)
+            for field, (model, related_field) in counters.items()
+        }
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    self.select_for_update(of=('self',)).filter(
+                        pk__gt=last_pk
+                    ).annotate(**annotations).order_by('pk')[:batch_size]
+                )
+                if not batch:
+                    break
+                changed = []
+                for obj in batch:
+                    drift = False
+                    for field in fields:
+                        actual = getattr(obj, f'actual_{field}')
+                        if getattr(obj, field) != actual:
+                            setattr(obj, field, actual)
+                            drift = True
+                    if drift:
+                        changed.append(obj)
+                self.model.objects.bulk_update(changed, fields)
+            checked += len(batch)
+            fixed += len(changed)
+            last_pk = batch[-1].pk
+        return checked, fixed
@@ -45,9 +45,10 @@ class RecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
     def get_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
     get_favorite.short_description = 'Количество добавлений в избранное'
+    get_favorite.admin_order_field = 'favorites_count'
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import RECIPE_COUNTERS, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики favorites_count и cart_count рецептов '
+            'и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        checked, fixed = Recipe.objects.recount({
+            field: (model, 'recipe')
+            for model, field in RECIPE_COUNTERS.items()
+        }, batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено рецептов: {checked}, исправлено: {fixed}'))
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+def create_ingredient_upper_name_index(apps, schema_editor):
+    # Индекс для name__istartswith: Django строит UPPER(name::text) LIKE.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS ingredient_upper_name_idx '
+        'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)'
+    )
+
+
+def drop_ingredient_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ingredient_upper_name_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-publish_date', '-id'], name='recipe_publish_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-publish_date'], name='recipe_author_date_idx'),
+        ),
+        migrations.RunPython(
+            create_ingredient_upper_name_index,
+            drop_ingredient_upper_name_index,
+        ),
+    ]
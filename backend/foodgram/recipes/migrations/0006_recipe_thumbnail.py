@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Миниатюра'),
+        ),
+    ]
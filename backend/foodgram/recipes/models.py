@@ -1,7 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from .search import FTS_TABLE, FTSDocumentField
+from core.querysets import CounterQuerySet
+
 User = get_user_model()
 
 
@@ -19,6 +23,13 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        indexes = (
+            models.Index(
+                fields=['name'],
+                name='ingredient_name_pattern_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -71,6 +82,9 @@ class Recipe(models.Model):
         'Картинка',
         upload_to='recipes/images/'
     )
+    # Заполняется после создания миниатюры, см. api.images.
+    thumbnail = models.CharField(
+        'Миниатюра', max_length=100, blank=True, editable=False)
     author = models.ForeignKey(
         User,
         related_name='recipes',
@@ -79,16 +93,68 @@ class Recipe(models.Model):
     publish_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False,
+        help_text='Количество добавлений в избранное'
+    )
+    cart_count = models.PositiveIntegerField(
+        'Добавлений в список покупок',
+        default=0,
+        editable=False,
+        help_text='Количество добавлений в список покупок'
+    )
+    # Заполняется триггером базы данных, см. recipes.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CounterQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-publish_date',)
+        indexes = (
+            models.Index(
+                fields=['-publish_date', '-id'],
+                name='recipe_publish_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-publish_date'],
+                name='recipe_author_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-publish_date'],
+                name='recipe_popular_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
 
+class RecipeSearchIndex(models.Model):
+    """
+    FTS5-таблица поиска по рецептам в SQLite.
+
+    Таблицу создаёт recipes.search.install_search, а не миграции;
+    модель позволяет соединить её с рецептами средствами ORM.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_index'
+    )
+    document = FTSDocumentField(db_column=FTS_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -151,3 +217,9 @@ class ShoppingCart(models.Model):
                 name='unique_shoppingcart_user_recipe'
             ),
         )
+
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'cart_count',
+}
@@ -0,0 +1,156 @@
+"""
+Полнотекстовый поиск по рецептам.
+
+В PostgreSQL поле Recipe.search_vector заполняет триггер, а поиск
+идёт по GIN-индексу. В SQLite вместо него используется внешняя
+FTS5-таблица, которую синхронизируют триггеры на recipes_recipe.
+"""
+from functools import lru_cache
+
+from django.db import connections, models
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+
+POSTGRES_INSTALL = (
+    f"""
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    'CREATE TRIGGER recipes_recipe_search_vector_trigger '
+    'BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe '
+    'FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector_update()',
+    # Заполняет вектор у существующих рецептов через триггер.
+    'UPDATE recipes_recipe SET name = name',
+    'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)',
+)
+POSTGRES_UNINSTALL = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    'DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update()',
+)
+
+SQLITE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {FTS_TABLE} (rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+)
+SQLITE_UNINSTALL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+class FTSDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы: MATCH по всем столбцам."""
+
+    def deconstruct(self):
+        # Миграции описывают поле обычным TextField и не импортируют модуль.
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.TextField', args, kwargs
+
+
+FTSDocumentField.register_lookup(Match)
+
+
+@lru_cache()
+def has_fts_table(alias):
+    """
+    Есть ли FTS5-таблица в базе alias.
+
+    Кэш сбрасывают install_search, uninstall_search и post_migrate.
+    """
+    return FTS_TABLE in connections[alias].introspection.table_names()
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any('FTS5' in row[0] for row in cursor.fetchall())
+
+
+def install_search(connection):
+    """
+    Создаёт триггеры и индексы поиска; вызов можно повторять.
+
+    SQLite пересоздаёт таблицу при ALTER TABLE и теряет триггеры,
+    поэтому для неё функция вызывается и после каждой миграции.
+    """
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        tables = connection.introspection.table_names()
+        if 'recipes_recipe' not in tables:
+            return
+        statements = SQLITE_TRIGGERS
+        if FTS_TABLE not in tables:
+            statements = (
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"name, text, content='recipes_recipe', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')",
+                *statements,
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+            )
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    has_fts_table.cache_clear()
+
+
+def uninstall_search(connection):
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_UNINSTALL
+    elif connection.vendor == 'sqlite':
+        statements = SQLITE_UNINSTALL
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    has_fts_table.cache_clear()
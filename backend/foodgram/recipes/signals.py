@@ -0,0 +1,47 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import RECIPE_COUNTERS, Favorite, Recipe, ShoppingCart, User
+from .search import FTS_TABLE, has_fts_table, install_search
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_counter_increment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            RECIPE_COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_counter_decrement(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+        RECIPE_COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipes_count_increment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        User.objects.filter(pk=instance.author_id).change_counter(
+            'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipes_count_decrement(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).change_counter(
+        'recipes_count', -1)
+
+
+@receiver(post_migrate)
+def restore_sqlite_search(sender, app_config, using, **kwargs):
+    """SQLite теряет FTS-триггеры, когда миграция пересоздаёт таблицу."""
+    connection = connections[using]
+    if app_config.name != 'recipes':
+        return
+    has_fts_table.cache_clear()
+    if connection.vendor != 'sqlite':
+        return
+    if FTS_TABLE in connection.introspection.table_names():
+        install_search(connection)
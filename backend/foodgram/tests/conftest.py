@@ -0,0 +1,106 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+
+def get_image():
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2), 'white').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+IMAGE = get_image()
+
+
+@pytest.fixture(autouse=True)
+def isolate(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username='user', email='user@example.com', password='password',
+        first_name='Иван', last_name='Иванов')
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(
+        username='author', email='author@example.com', password='password',
+        first_name='Пётр', last_name='Петров')
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    token = Token.objects.create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    client = APIClient()
+    token = Token.objects.create(user=author)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=f'Тег {number}', color='#ffffff',
+                           slug=f'tag-{number}')
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+        for number in range(10)
+    )
+    return list(Ingredient.objects.all())
+
+
+@pytest.fixture
+def create_recipes(author, user, tags, ingredients):
+    """
+    Создаёт рецепты автора со всеми связями, которые отдаёт API.
+
+    Пользователь user подписан на автора, а рецепты лежат у него
+    в избранном и списке покупок.
+    """
+    Subscription.objects.get_or_create(subscriber=user, author=author)
+
+    def create(count):
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/test.png')
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=number + 1)
+                for ingredient in ingredients
+            )
+            Favorite.objects.create(user=user, recipe=recipe)
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+            recipes.append(recipe)
+        return recipes
+
+    return create
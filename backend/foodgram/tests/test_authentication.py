@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import invalidate_user_tokens, token_cache
+from users.models import User
+
+ME_URL = '/api/users/me/'
+
+
+@pytest.fixture(autouse=True, params=(None, 'default'),
+                ids=('local', 'shared'))
+def token_cache_alias(request, settings, transactional_db):
+    settings.AUTH_TOKEN_CACHE = request.param
+    token_cache.data.clear()
+    yield request.param
+    token_cache.data.clear()
+
+
+def get_token_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(ME_URL)
+    assert response.status_code == 200
+    return [
+        query for query in context.captured_queries
+        if 'authtoken_token' in query['sql']
+    ]
+
+
+def test_token_is_cached(user_client, token_cache_alias):
+    assert get_token_queries(user_client)
+    assert not get_token_queries(user_client)
+    # С общим кэшем локальный LRU не используется.
+    assert bool(token_cache.data) == (token_cache_alias is None)
+
+
+def test_logout_invalidates_token(user_client):
+    get_token_queries(user_client)
+    assert user_client.post('/api/auth/token/logout/').status_code == 204
+    assert user_client.get(ME_URL).status_code == 401
+
+
+def test_deactivated_user_is_rejected(user_client, user):
+    get_token_queries(user_client)
+    user.is_active = False
+    user.save()
+    assert user_client.get(ME_URL).status_code == 401
+
+
+def test_update_requires_explicit_invalidation(user_client, user):
+    get_token_queries(user_client)
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    invalidate_user_tokens([user.pk])
+    assert user_client.get(ME_URL).status_code == 401
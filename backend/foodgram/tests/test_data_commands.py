@@ -0,0 +1,114 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.management.commands.export_data import EXPORT_MODELS
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+def run(*args):
+    call_command(*args, stdout=StringIO(), stderr=StringIO())
+
+
+def write_ndjson(path, records):
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('batch_size', ('1', '100'))
+def test_load_ingredients_is_idempotent(transactional_db, tmp_path,
+                                        batch_size):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(
+        'name,measurement_unit\n'
+        'соль,г\nсахар,г\nмолоко,мл\nсоль,г\nсоль,щепотка\n',
+        encoding='utf-8')
+    Ingredient.objects.create(name='сахар', measurement_unit='г')
+    run('load_ingredients', str(path), '--batch-size', batch_size)
+    run('load_ingredients', str(path), '--batch-size', batch_size)
+    assert sorted(Ingredient.objects.values_list(
+        'name', 'measurement_unit')) == [
+        ('молоко', 'мл'), ('сахар', 'г'), ('соль', 'г'), ('соль', 'щепотка'),
+    ]
+
+
+def recipe_record(author, name, amount, tags):
+    return {
+        'author': author.username, 'name': name, 'text': 'Текст',
+        'cooking_time': 10, 'image': 'recipes/images/test.png',
+        'tags': [tag.slug for tag in tags],
+        'ingredients': [
+            {'name': 'Ингредиент 0', 'measurement_unit': 'г',
+             'amount': amount},
+            {'name': 'Ингредиент 1', 'measurement_unit': 'г',
+             'amount': 1},
+        ],
+    }
+
+
+def test_import_recipes_is_idempotent(tmp_path, author, tags, ingredients):
+    records = [
+        recipe_record(author, 'Суп', 2, tags),
+        recipe_record(author, 'Каша', 3, tags[:1]),
+        dict(recipe_record(author, 'Чужой', 1, tags), author='nobody'),
+    ]
+    path = write_ndjson(tmp_path / 'recipes.jsonl.gz', records)
+    run('import_recipes', path, '--batch-size', '2')
+    rows = set(RecipeIngredient.objects.values_list('pk', 'amount'))
+    run('import_recipes', path, '--batch-size', '2')
+    assert set(RecipeIngredient.objects.values_list('pk', 'amount')) == rows
+    assert sorted(Recipe.objects.values_list('name', flat=True)) == [
+        'Каша', 'Суп']
+    soup = Recipe.objects.get(name='Суп')
+    assert soup.tags.count() == 3
+    assert soup.recipeingredient_set.get(
+        ingredient__name='Ингредиент 0').amount == 2
+    author.refresh_from_db()
+    assert author.recipes_count == 2
+
+
+def test_import_recipes_updates_changed(tmp_path, author, tags, ingredients):
+    run('import_recipes', write_ndjson(
+        tmp_path / 'first.jsonl.gz', [recipe_record(author, 'Суп', 2, tags)]))
+    record = recipe_record(author, 'Суп', 5, tags[:1])
+    record['ingredients'].pop()
+    run('import_recipes', write_ndjson(tmp_path / 'second.jsonl.gz', [record]))
+    soup = Recipe.objects.get()
+    assert list(soup.tags.all()) == tags[:1]
+    assert list(soup.recipeingredient_set.values_list(
+        'ingredient__name', 'amount')) == [('Ингредиент 0', 5)]
+    assert User.objects.get(pk=author.pk).recipes_count == 1
+
+
+def dump():
+    return {
+        model._meta.label_lower: list(model.objects.order_by('pk').values(
+            *[field.attname for field in model._meta.concrete_fields
+              if field.name != 'search_vector']))
+        for model in EXPORT_MODELS
+    }
+
+
+def test_export_import_round_trip(tmp_path, create_recipes, author):
+    create_recipes(3)
+    expected = dump()
+    path = str(tmp_path / 'backup.jsonl.gz')
+    run('export_data', path, '--chunk-size', '2')
+    User.objects.all().delete()
+    Tag.objects.all().delete()
+    Ingredient.objects.all().delete()
+    run('import_data', path, '--batch-size', '2')
+    assert dump() == expected
+    run('import_data', path)
+    assert dump() == expected
+    # Последовательности сдвинуты за импортированные ключи.
+    recipe = Recipe.objects.create(
+        author=author, name='Новый', text='Текст', cooking_time=1,
+        image='recipes/images/test.png')
+    assert recipe.pk > max(row['id'] for row in expected['recipes.recipe'])
@@ -0,0 +1,62 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.db.utils import InterfaceError
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(connection, 'close_if_health_check_failed'),
+    reason='Нужен бэкенд core.backends.postgresql'
+)
+
+
+@pytest.fixture
+def persistent_connection(transactional_db):
+    connection.ensure_connection()
+    connection.close_at = None
+    yield connection
+    connection.close()
+
+
+def start_request():
+    # Как close_old_connections по сигналу request_started.
+    connection.close_if_unusable_or_obsolete()
+
+
+def select_one():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        return cursor.fetchone()[0]
+
+
+def test_broken_connection_is_replaced(persistent_connection):
+    persistent_connection.connection.close()
+    start_request()
+    assert select_one() == 1
+
+
+def test_health_check_runs_once_per_request(persistent_connection):
+    start_request()
+    with mock.patch.object(
+            persistent_connection, 'is_usable',
+            wraps=persistent_connection.is_usable) as is_usable:
+        select_one()
+        select_one()
+    assert is_usable.call_count == 1
+
+
+def test_request_without_queries_skips_check(persistent_connection):
+    with mock.patch.object(persistent_connection, 'is_usable') as is_usable:
+        start_request()
+    is_usable.assert_not_called()
+
+
+def test_health_checks_disabled(persistent_connection):
+    persistent_connection.health_check_enabled = False
+    try:
+        persistent_connection.connection.close()
+        start_request()
+        with pytest.raises(InterfaceError):
+            select_one()
+    finally:
+        persistent_connection.health_check_enabled = True
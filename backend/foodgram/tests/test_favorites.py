@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+RELATIONS = (('favorite', 'favorites_count'), ('shopping_cart', 'cart_count'))
+
+
+@pytest.mark.parametrize('url, counter', RELATIONS)
+def test_add_single_recipe(user_client, author, url, counter):
+    recipe = Recipe.objects.create(
+        author=author, name='Рецепт', text='Текст', cooking_time=10,
+        image='recipes/images/test.png')
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.post(f'/api/recipes/{recipe.pk}/{url}/')
+    assert response.status_code == 201
+    assert not any(
+        'FOR UPDATE' in query['sql'] for query in context.captured_queries)
+    assert user_client.post(
+        f'/api/recipes/{recipe.pk}/{url}/').status_code == 400
+    recipe.refresh_from_db()
+    assert getattr(recipe, counter) == 1
+
+
+@pytest.mark.parametrize('url, counter', RELATIONS)
+def test_bulk_add_statuses(user_client, create_recipes, author, url,
+                           counter):
+    added, = create_recipes(1)
+    recipe = Recipe.objects.create(
+        author=author, name='Новый рецепт', text='Текст', cooking_time=10,
+        image='recipes/images/test.png')
+    missing = recipe.pk + 1000
+    payload = {'recipes': [recipe.pk, added.pk, missing, recipe.pk]}
+    response = user_client.post(
+        f'/api/recipes/{url}/', payload, format='json')
+    assert response.status_code == 201
+    assert response.data['results'] == [
+        {'id': recipe.pk, 'status': 'created'},
+        {'id': added.pk, 'status': 'exists'},
+        {'id': missing, 'status': 'not_found'},
+    ]
+    recipe.refresh_from_db()
+    added.refresh_from_db()
+    assert (getattr(recipe, counter), getattr(added, counter)) == (1, 1)
+    response = user_client.post(
+        f'/api/recipes/{url}/', {'recipes': [recipe.pk]}, format='json')
+    assert response.status_code == 200
+    assert response.data['results'] == [{'id': recipe.pk, 'status': 'exists'}]
+    recipe.refresh_from_db()
+    assert getattr(recipe, counter) == 1
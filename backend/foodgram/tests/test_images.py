@@ -0,0 +1,99 @@
+import base64
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from .conftest import IMAGE
+from api.images import (StreamingBase64ImageField, get_thumbnail_name,
+                        get_thumbnail_url, make_thumbnail)
+from recipes.models import Recipe
+
+
+def get_payload(tags, ingredients, image):
+    return {
+        'name': 'Новый рецепт',
+        'text': 'Текст',
+        'cooking_time': 5,
+        'image': image,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 2}],
+    }
+
+
+@pytest.fixture
+def recipe_with_image(author):
+    buffer = BytesIO()
+    Image.new('RGB', (1000, 800), 'red').save(buffer, 'PNG')
+    image_name = default_storage.save(
+        'recipes/images/large.png', ContentFile(buffer.getvalue()))
+    return Recipe.objects.create(
+        author=author, name='Рецепт', text='Текст', cooking_time=10,
+        image=image_name)
+
+
+def test_streaming_decode():
+    upload = StreamingBase64ImageField().to_internal_value(IMAGE)
+    assert upload.name.endswith('.png')
+    assert upload.size == len(base64.b64decode(IMAGE.split(',')[1]))
+    with Image.open(upload) as image:
+        assert image.size == (2, 2)
+
+
+@pytest.mark.parametrize('image', (
+    'data:image/png;base64,@@@@',
+    'data:image/png;base64,' + base64.b64encode(b'not an image').decode(),
+))
+def test_invalid_image(author_client, tags, ingredients, image):
+    response = author_client.post(
+        '/api/recipes/', get_payload(tags, ingredients, image),
+        format='json')
+    assert response.status_code == 400
+    assert 'image' in response.data
+
+
+def test_image_size_limit(author_client, tags, ingredients, settings):
+    settings.IMAGE_MAX_SIZE = 10
+    response = author_client.post(
+        '/api/recipes/', get_payload(tags, ingredients, IMAGE),
+        format='json')
+    assert response.status_code == 400
+    assert '10 байт' in str(response.data['image'])
+
+
+def test_make_thumbnail(recipe_with_image):
+    image_name = recipe_with_image.image.name
+    assert get_thumbnail_url(recipe_with_image).endswith(image_name)
+    thumbnail_name = make_thumbnail(recipe_with_image.pk, image_name)
+    assert thumbnail_name == get_thumbnail_name(image_name)
+    with default_storage.open(thumbnail_name) as file:
+        with Image.open(file) as thumbnail:
+            assert max(thumbnail.size) == 480
+    recipe_with_image.refresh_from_db()
+    assert recipe_with_image.thumbnail == thumbnail_name
+    with mock.patch.object(default_storage, 'exists') as exists:
+        assert get_thumbnail_url(recipe_with_image).endswith(thumbnail_name)
+    exists.assert_not_called()
+
+
+def test_thumbnail_of_replaced_image_is_ignored(recipe_with_image):
+    make_thumbnail(recipe_with_image.pk, recipe_with_image.image.name)
+    recipe_with_image.refresh_from_db()
+    recipe_with_image.image = 'recipes/images/other.png'
+    assert get_thumbnail_url(recipe_with_image).endswith('other.png')
+
+
+def test_generate_thumbnails(recipe_with_image):
+    output = StringIO()
+    call_command('generate_thumbnails', stdout=output)
+    assert 'Обработано изображений: 1' in output.getvalue()
+    recipe_with_image.refresh_from_db()
+    assert recipe_with_image.thumbnail == get_thumbnail_name(
+        recipe_with_image.image.name)
+    output = StringIO()
+    call_command('generate_thumbnails', stdout=output)
+    assert 'Обработано изображений: 0' in output.getvalue()
@@ -0,0 +1,91 @@
+"""
+Планы запросов фильтров рецептов и ингредиентов.
+
+Тесты с EXPLAIN выполняются только в PostgreSQL. На маленьких тестовых
+таблицах планировщик предпочитает полный просмотр, поэтому он
+отключается (enable_seqscan): тест проверяет, что ни одна таблица
+запроса не читается полным просмотром и выбран ожидаемый индекс.
+"""
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+
+from api.filters import IngredientFilter, RecipeFilter
+from api.querysets import get_recipes_for_read, search_recipes
+from recipes.models import Ingredient, Recipe
+
+
+@pytest.fixture
+def explain(db):
+    if connection.vendor != 'postgresql':
+        pytest.skip('EXPLAIN проверяется только в PostgreSQL')
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def explain(queryset, index):
+        plan = queryset.explain()
+        assert 'Seq Scan' not in plan, plan
+        assert index in plan, plan
+
+    return explain
+
+
+@pytest.fixture
+def filter_recipes(user, create_recipes):
+    create_recipes(3)
+
+    def filter_recipes(data):
+        return RecipeFilter(
+            data, queryset=get_recipes_for_read(user),
+            request=SimpleNamespace(user=user)
+        ).qs[:6]
+
+    return filter_recipes
+
+
+@pytest.mark.parametrize('data, index', (
+    ({}, 'recipe_publish_date_idx'),
+    ({'ordering': 'popular'}, 'recipe_popular_idx'),
+    ({'is_favorited': True}, 'recipes_favorite_user_id'),
+    ({'is_in_shopping_cart': True}, 'recipes_shoppingcart_user_id'),
+))
+def test_recipe_filter_index(explain, filter_recipes, data, index):
+    explain(filter_recipes(data), index)
+
+
+def test_recipe_author_index(explain, filter_recipes, author):
+    explain(filter_recipes({'author': author.pk}), 'recipe_author_date_idx')
+
+
+def test_recipe_tags_index(explain, filter_recipes, tags):
+    explain(filter_recipes({'tags': [tags[0].slug]}),
+            'recipes_recipe_tags_tag_id')
+
+
+def test_recipe_search_index(explain, create_recipes):
+    create_recipes(3)
+    explain(search_recipes(Recipe.objects.all(), 'рецепт'),
+            'recipe_search_vector_idx')
+
+
+def test_ingredient_name_index(explain, ingredients):
+    queryset = IngredientFilter(
+        {'name': 'ингр'}, queryset=Ingredient.objects.all()).qs
+    assert queryset.count() == len(ingredients)
+    explain(queryset, 'ingredient_upper_name_idx')
+
+
+def test_ingredient_lookup_index(explain, ingredients):
+    queryset = Ingredient.objects.filter(
+        name__in=[ingredient.name for ingredient in ingredients[:2]])
+    explain(queryset, 'ingredient_name_pattern_idx')
+
+
+def test_recipe_tags_no_duplicates(client, create_recipes, tags):
+    recipes = create_recipes(3)
+    response = client.get(
+        '/api/recipes/?limit=10&'
+        + '&'.join(f'tags={tag.slug}' for tag in tags))
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        recipe.pk for recipe in reversed(recipes)]
@@ -0,0 +1,39 @@
+import pytest
+
+URL = '/api/metrics'
+
+
+@pytest.fixture(autouse=True)
+def metrics(settings):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_TOKEN = 'secret'
+
+
+def test_metrics_denied_for_anonymous(client, db):
+    assert client.get(URL).status_code == 403
+    response = client.get(URL, HTTP_AUTHORIZATION='Bearer wrong')
+    assert response.status_code == 403
+
+
+def test_metrics_denied_for_user(client, user):
+    client.force_login(user)
+    assert client.get(URL).status_code == 403
+
+
+def test_metrics_with_token(client, db):
+    response = client.get(URL, HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == 200
+    assert b'foodgram_db_connections_opened_total' in response.content
+
+
+def test_metrics_for_staff(client, user):
+    user.is_staff = True
+    user.save()
+    client.force_login(user)
+    assert client.get(URL).status_code == 200
+
+
+def test_empty_token_is_not_accepted(client, db, settings):
+    settings.METRICS_TOKEN = ''
+    response = client.get(URL, HTTP_AUTHORIZATION='Bearer ')
+    assert response.status_code == 403
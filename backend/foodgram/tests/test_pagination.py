@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+CURSOR_URL = '/api/recipes/?pagination=cursor&limit=3'
+
+
+@pytest.fixture
+def same_date_recipes(create_recipes):
+    """Рецепты с одинаковой датой публикации: порядок решает id."""
+    recipes = create_recipes(8)
+    Recipe.objects.update(publish_date=timezone.now())
+    return sorted((recipe.pk for recipe in recipes), reverse=True)
+
+
+def walk(client, url, key):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([recipe['id'] for recipe in response.data['results']])
+        url = response.data[key]
+    return pages
+
+
+def test_cursor_pages_with_equal_dates(client, same_date_recipes):
+    pages = walk(client, CURSOR_URL, 'next')
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert sum(pages, []) == same_date_recipes
+    last_page = client.get(CURSOR_URL).data
+    last_page = client.get(client.get(last_page['next']).data['next']).data
+    previous = walk(client, last_page['previous'], 'previous')
+    assert sum(reversed(previous), []) == same_date_recipes[:6]
+
+
+def test_cursor_seeks_without_offset(client, same_date_recipes):
+    next_url = client.get(CURSOR_URL).data['next']
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(next_url)
+    assert [recipe['id'] for recipe in response.data['results']] == (
+        same_date_recipes[3:6])
+    recipe_queries = [
+        query['sql'] for query in context.captured_queries
+        if 'ORDER BY' in query['sql'] and 'publish_date' in query['sql']
+    ]
+    assert recipe_queries
+    assert not any('OFFSET' in sql for sql in recipe_queries)
+
+
+def test_invalid_cursor(client, same_date_recipes):
+    assert client.get(f'{CURSOR_URL}&cursor=bad').status_code == 404
+
+
+@pytest.mark.parametrize('count, expected', (
+    ('exact', 8), ('approximate', int), (None, None),
+))
+def test_cursor_count_modes(client, same_date_recipes, count, expected):
+    url = f'{CURSOR_URL}&count={count}' if count else CURSOR_URL
+    result = client.get(url).data['count']
+    if isinstance(expected, type):
+        assert isinstance(result, expected)
+    else:
+        assert result == expected
+
+
+@pytest.mark.parametrize('params', (
+    '', '&ordering=popular', '&search=Рецепт',
+))
+def test_page_number_fallback(client, same_date_recipes, params):
+    url = '/api/recipes/?limit=3' + params
+    if params:
+        url = CURSOR_URL + params
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data['count'] == 8
+    assert 'page=2' in response.data['next']
+    assert 'cursor=' not in response.data['next']
@@ -0,0 +1,80 @@
+import re
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from api.profiling import ProfileBuffer, ProfilingMiddleware, profile_buffer
+from users.models import User
+
+URL = '/api/profiling/'
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", total;dur=[\d.]+')
+
+
+@pytest.fixture(autouse=True)
+def profiling(settings):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 1
+    profile_buffer.clear()
+    yield
+    profile_buffer.clear()
+
+
+def view(request):
+    list(User.objects.all())
+    list(User.objects.all())
+    return HttpResponse()
+
+
+def test_disabled(settings):
+    settings.PROFILING_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(view)
+
+
+def test_server_timing(db):
+    response = ProfilingMiddleware(view)(RequestFactory().get('/'))
+    assert SERVER_TIMING.fullmatch(response['Server-Timing']).group(1) == '2'
+    result, = profile_buffer.report()
+    assert result['view'] == 'GET <unresolved>'
+    assert result['queries'] == {'p50': 2, 'max': 2}
+
+
+@pytest.mark.parametrize('sample_rate, sampled', ((0, False), (1, True)))
+def test_sampling(db, settings, sample_rate, sampled):
+    settings.PROFILING_SAMPLE_RATE = sample_rate
+    response = ProfilingMiddleware(view)(RequestFactory().get('/'))
+    assert response.has_header('Server-Timing') == sampled
+    assert bool(profile_buffer.report()) == sampled
+
+
+def test_ring_buffer_keeps_last_samples():
+    buffer = ProfileBuffer(3)
+    for wall_ms in (50, 1, 2, 3, 4):
+        buffer.add('GET slow', wall_ms, 0, 1)
+    buffer.add('GET fast', 1, 0, 1)
+    slow, fast = buffer.report()
+    assert (slow['view'], slow['samples']) == ('GET slow', 3)
+    assert slow['wall_ms'] == {'p50': 3, 'p95': 4, 'p99': 4}
+    assert (fast['view'], fast['samples']) == ('GET fast', 1)
+
+
+def test_report_is_admin_only(client, user_client):
+    assert client.get(URL).status_code == 401
+    assert user_client.get(URL).status_code == 403
+    admin = User.objects.create_user(
+        username='admin', email='admin@example.com', password='password',
+        is_staff=True)
+    client = APIClient()
+    client.force_authenticate(admin)
+    client.get('/api/tags/')
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert 'GET tags-list' in [item['view'] for item in response.data]
+    assert client.delete(URL).status_code == 204
+    # Сам DELETE замеряется уже после очистки.
+    assert [item['view'] for item in profile_buffer.report()] == [
+        'DELETE profiling']
@@ -0,0 +1,88 @@
+"""
+Бюджеты SQL-запросов для чтения и записи рецептов.
+
+Число запросов не должно зависеть от числа рецептов, тегов и
+ингредиентов: каждый тест проверяет бюджет на разном объёме данных.
+"""
+import pytest
+
+from .conftest import IMAGE
+from .utils import assert_max_queries
+
+# Токен (при промахе кэша), COUNT(*), рецепты, теги, ингредиенты
+# и авторы с is_subscribed.
+LIST_BUDGET = 6
+# Токен, рецепт, теги, ингредиенты, автор.
+DETAIL_BUDGET = 5
+# Токен, проверка тегов и ингредиентов, транзакция записи
+# и чтение рецепта для ответа. Обновление дополнительно читает
+# рецепт и его автора и сравнивает теги и ингредиенты с базой.
+CREATE_BUDGET = 14
+UPDATE_BUDGET = 18
+
+
+@pytest.mark.parametrize('count', (1, 10))
+@pytest.mark.parametrize('client_name', ('client', 'user_client'))
+def test_recipe_list(request, create_recipes, client_name, count):
+    create_recipes(count)
+    client = request.getfixturevalue(client_name)
+    with assert_max_queries(LIST_BUDGET):
+        response = client.get('/api/recipes/?limit=6')
+    assert response.status_code == 200
+    assert len(response.data['results']) == min(count, 6)
+
+
+@pytest.mark.parametrize('count', (1, 10))
+def test_recipe_list_authenticated_flags(user_client, create_recipes, count):
+    create_recipes(count)
+    with assert_max_queries(LIST_BUDGET):
+        response = user_client.get('/api/recipes/?limit=10')
+    for recipe in response.data['results']:
+        assert recipe['is_favorited']
+        assert recipe['is_in_shopping_cart']
+        assert recipe['author']['is_subscribed']
+
+
+@pytest.mark.parametrize('client_name', ('client', 'user_client'))
+def test_recipe_detail(request, create_recipes, client_name):
+    recipe, = create_recipes(1)
+    client = request.getfixturevalue(client_name)
+    with assert_max_queries(DETAIL_BUDGET):
+        response = client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+    assert len(response.data['ingredients']) == 10
+
+
+def get_payload(tags, ingredients):
+    return {
+        'name': 'Новый рецепт',
+        'text': 'Текст',
+        'cooking_time': 5,
+        'image': IMAGE,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': 2} for ingredient in ingredients
+        ],
+    }
+
+
+@pytest.mark.parametrize('size', (1, 10))
+def test_recipe_create(author_client, tags, ingredients, size):
+    payload = get_payload(tags[:size], ingredients[:size])
+    with assert_max_queries(CREATE_BUDGET):
+        response = author_client.post(
+            '/api/recipes/', payload, format='json')
+    assert response.status_code == 201, response.data
+    assert len(response.data['ingredients']) == size
+
+
+@pytest.mark.parametrize('size', (1, 10))
+def test_recipe_update(author_client, create_recipes, tags, ingredients,
+                       size):
+    recipe, = create_recipes(1)
+    payload = get_payload(tags[:size], ingredients[-size:])
+    with assert_max_queries(UPDATE_BUDGET):
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/', payload, format='json')
+    assert response.status_code == 200, response.data
+    assert len(response.data['ingredients']) == size
@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import RecipeIngredient
+
+
+@pytest.fixture
+def recipe(create_recipes, ingredients):
+    """Рецепт с ингредиентами 0-2 в количестве 1."""
+    recipe, = create_recipes(1)
+    RecipeIngredient.objects.filter(recipe=recipe).exclude(
+        ingredient__in=ingredients[:3]).delete()
+    return recipe
+
+
+def update(client, recipe, tags, amounts):
+    return client.patch(f'/api/recipes/{recipe.pk}/', {
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': amount}
+            for ingredient, amount in amounts
+        ],
+        'tags': [tag.pk for tag in tags],
+        'cooking_time': 10,
+    }, format='json')
+
+
+def get_rows(recipe):
+    return {
+        row.ingredient_id: (row.pk, row.amount)
+        for row in RecipeIngredient.objects.filter(recipe=recipe)
+    }
+
+
+def get_writes(context):
+    return [
+        query['sql'].split()[0] for query in context.captured_queries
+        if 'recipes_recipeingredient' in query['sql']
+        and not query['sql'].startswith('SELECT')
+    ]
+
+
+def test_update_changes_only_amounts(author_client, recipe, tags,
+                                     ingredients):
+    before = get_rows(recipe)
+    with CaptureQueriesContext(connection) as context:
+        response = update(author_client, recipe, tags, [
+            (ingredients[0], 1), (ingredients[1], 5), (ingredients[2], 1)])
+    assert response.status_code == 200
+    assert get_writes(context) == ['UPDATE']
+    after = get_rows(recipe)
+    assert after[ingredients[1].pk] == (before[ingredients[1].pk][0], 5)
+    assert after[ingredients[0].pk] == before[ingredients[0].pk]
+
+
+def test_update_adds_and_removes(author_client, recipe, tags, ingredients):
+    before = get_rows(recipe)
+    with CaptureQueriesContext(connection) as context:
+        response = update(author_client, recipe, tags, [
+            (ingredients[0], 1), (ingredients[2], 1), (ingredients[5], 7)])
+    assert response.status_code == 200
+    assert sorted(get_writes(context)) == ['DELETE', 'INSERT']
+    after = get_rows(recipe)
+    assert after.keys() == {
+        ingredients[0].pk, ingredients[2].pk, ingredients[5].pk}
+    assert after[ingredients[2].pk] == before[ingredients[2].pk]
+    assert after[ingredients[5].pk][1] == 7
+
+
+def test_update_reorder_keeps_rows(author_client, recipe, tags, ingredients):
+    before = get_rows(recipe)
+    with CaptureQueriesContext(connection) as context:
+        response = update(author_client, recipe, tags, [
+            (ingredients[2], 1), (ingredients[0], 1), (ingredients[1], 1)])
+    assert response.status_code == 200
+    assert get_writes(context) == []
+    assert get_rows(recipe) == before
+
+
+@pytest.mark.parametrize('field', ('ingredients', 'tags'))
+def test_unknown_ids_in_one_error(author_client, recipe, tags, ingredients,
+                                  field):
+    payload = {
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 1}],
+        'tags': [tags[0].pk],
+        'cooking_time': 10,
+    }
+    missing = [max(item.pk for item in ingredients + tags) + number
+               for number in (1, 2)]
+    if field == 'tags':
+        payload['tags'] += missing
+    else:
+        payload['ingredients'] += [
+            {'id': pk, 'amount': 1} for pk in missing]
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/', payload, format='json')
+    assert response.status_code == 400
+    errors = response.data[field]
+    assert len(errors) == 1
+    assert f'{missing[0]}, {missing[1]}' in str(errors[0])
+    table = 'recipes_ingredient' if field == 'ingredients' else 'recipes_tag'
+    assert len([
+        query for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]) == 1
+
+
+@pytest.mark.parametrize('field, message', (
+    ('ingredients', 'Ингредиенты должны быть уникальными'),
+    ('tags', 'Тэги должны быть уникальными!'),
+))
+def test_duplicate_ids(author_client, recipe, tags, ingredients, field,
+                       message):
+    payload = {
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 1}],
+        'tags': [tags[0].pk],
+        'cooking_time': 10,
+    }
+    payload[field] = payload[field] * 2
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/', payload, format='json')
+    assert response.status_code == 400
+    assert response.data[field] == [message]
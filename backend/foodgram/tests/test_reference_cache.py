@@ -0,0 +1,33 @@
+import pytest
+
+from .utils import assert_max_queries
+from api.cache import get_data_version
+from recipes.models import Ingredient, Tag
+
+URLS = {Tag: '/api/tags/', Ingredient: '/api/ingredients/'}
+
+
+@pytest.mark.parametrize('model', (Tag, Ingredient))
+def test_not_modified(client, tags, ingredients, model):
+    response = client.get(URLS[model])
+    assert response.status_code == 200
+    etag = response['ETag']
+    with assert_max_queries(0):
+        response = client.get(URLS[model], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+@pytest.mark.parametrize('model', (Tag, Ingredient))
+def test_save_bumps_version(transactional_db, client, tags, ingredients,
+                            model):
+    etag = client.get(URLS[model])['ETag']
+    version = get_data_version(model)
+    instance = model.objects.first()
+    instance.name = 'Новое имя'
+    instance.save()
+    assert get_data_version(model) != version
+    response = client.get(URLS[model], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert 'Новое имя' in response.content.decode()
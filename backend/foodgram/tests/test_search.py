@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+
+from api.querysets import search_recipes
+from recipes.models import Recipe
+from recipes.search import has_fts_table, install_search
+
+URL = '/api/recipes/'
+
+
+@pytest.fixture
+def recipes(author):
+    def create(name, text):
+        return Recipe.objects.create(
+            author=author, name=name, text=text, cooking_time=10,
+            image='recipes/images/test.png')
+
+    return {
+        'name': create('Борщ', 'Свёкла, капуста и картофель'),
+        'text': create('Суп дня', 'Готовим как борщ, но без свёклы'),
+        'other': create('Омлет', 'Яйца и молоко'),
+    }
+
+
+@pytest.fixture
+def full_text(db):
+    if connection.vendor == 'postgresql':
+        return
+    if connection.vendor != 'sqlite' or not has_fts_table('default'):
+        pytest.skip('Нужен PostgreSQL или SQLite с FTS5')
+
+
+def test_search_ranks_name_above_text(client, recipes, full_text):
+    response = client.get(URL, {'search': 'борщ', 'limit': 6})
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        recipes['name'].pk, recipes['text'].pk]
+
+
+def test_search_annotates_rank(recipes, full_text):
+    found = list(search_recipes(Recipe.objects.all(), 'борщ'))
+    assert [recipe.pk for recipe in found] == [
+        recipes['name'].pk, recipes['text'].pk]
+    assert found[0].rank > found[1].rank > 0
+
+
+def test_search_follows_updates(recipes, full_text):
+    recipe = recipes['other']
+    recipe.name = 'Борщ зелёный'
+    recipe.save()
+    found = search_recipes(Recipe.objects.all(), 'зелёный')
+    assert list(found.values_list('pk', flat=True)) == [recipe.pk]
+    recipe.delete()
+    assert not search_recipes(Recipe.objects.all(), 'зелёный').exists()
+
+
+def test_search_without_words(recipes, full_text):
+    if connection.vendor != 'sqlite':
+        pytest.skip('Проверка разбора запроса для FTS5')
+    assert not search_recipes(Recipe.objects.all(), '!!!').exists()
+
+
+def test_has_fts_table_is_reset(db):
+    has_fts_table('default')
+    assert has_fts_table.cache_info().currsize == 1
+    install_search(connection)
+    assert has_fts_table.cache_info().currsize == 0
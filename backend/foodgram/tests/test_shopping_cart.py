@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, RecipeIngredient, ShoppingCart
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.mark.parametrize('file_format', ('pdf', 'txt', 'csv', 'json'))
+def test_download_error_is_json(client, db, file_format):
+    response = client.get(URL, {'format': file_format})
+    assert response.status_code == 401
+    assert response['Content-Type'] == 'application/json'
+    assert 'detail' in response.json()
+
+
+@pytest.mark.parametrize('file_format, content_type', (
+    ('pdf', 'application/pdf'),
+    ('txt', 'text/plain; charset=utf-8'),
+    ('csv', 'text/csv; charset=utf-8'),
+    ('json', 'application/json; charset=utf-8'),
+))
+def test_download_file(user_client, create_recipes, file_format,
+                       content_type):
+    create_recipes(2)
+    response = user_client.get(URL, {'format': file_format})
+    assert response.status_code == 200
+    assert response['Content-Type'] == content_type
+    assert response['ETag']
+    assert b''.join(response.streaming_content)
+
+
+def test_download_streams_aggregated_rows(user_client, create_recipes):
+    create_recipes(2)
+    response = user_client.get(URL, {'format': 'json'})
+    assert response.streaming
+    rows = json.loads(b''.join(response.streaming_content))
+    assert len(rows) == 10
+    assert {row['amount'] for row in rows} == {3}
+
+
+def test_download_not_modified_skips_aggregation(user_client, create_recipes):
+    create_recipes(2)
+    etag = user_client.get(URL, {'format': 'txt'})['ETag']
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(
+            URL, {'format': 'txt'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not any(
+        'recipes_recipeingredient' in query['sql']
+        for query in context.captured_queries
+    )
+    assert user_client.get(
+        URL, {'format': 'csv'}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def change_ingredient_amount(recipe):
+    ingredient = RecipeIngredient.objects.filter(recipe=recipe).first()
+    ingredient.amount += 1
+    ingredient.save()
+
+
+def rename_ingredient(recipe):
+    ingredient = Ingredient.objects.filter(recipe=recipe).first()
+    ingredient.name = 'Переименованный ингредиент'
+    ingredient.save()
+
+
+@pytest.mark.parametrize('change', (
+    change_ingredient_amount,
+    rename_ingredient,
+    lambda recipe: ShoppingCart.objects.filter(recipe=recipe).delete(),
+), ids=('amount', 'rename', 'remove'))
+def test_etag_changes_after_commit(transactional_db, user_client,
+                                   create_recipes, change):
+    """Сигналы сбрасывают метку только в on_commit."""
+    recipe, _ = create_recipes(2)
+    etag = user_client.get(URL, {'format': 'txt'})['ETag']
+    assert user_client.get(URL, {'format': 'txt'})['ETag'] == etag
+    change(recipe)
+    response = user_client.get(
+        URL, {'format': 'txt'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
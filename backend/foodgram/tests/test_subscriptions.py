@@ -0,0 +1,38 @@
+from django.core.management import call_command
+
+from .utils import assert_max_queries
+from users.models import User
+
+# Токен, COUNT(*), авторы, последние рецепты авторов.
+SUBSCRIPTIONS_BUDGET = 4
+
+
+def test_subscribers_count(user_client, author):
+    response = user_client.post(f'/api/users/{author.pk}/subscribe/')
+    assert response.status_code == 201
+    assert response.data['subscribers_count'] == 1
+    response = user_client.get(f'/api/users/{author.pk}/')
+    assert response.data['subscribers_count'] == 1
+    user_client.delete(f'/api/users/{author.pk}/subscribe/')
+    author.refresh_from_db()
+    assert author.subscribers_count == 0
+
+
+def test_subscriptions_query_budget(user_client, create_recipes, author):
+    create_recipes(5)
+    with assert_max_queries(SUBSCRIPTIONS_BUDGET):
+        response = user_client.get(
+            '/api/users/subscriptions/?limit=6&recipes_limit=3')
+    result, = response.data['results']
+    assert result['recipes_count'] == 5
+    assert result['subscribers_count'] == 1
+    assert len(result['recipes']) == 3
+
+
+def test_recount_user_counters(create_recipes, author):
+    create_recipes(2)
+    User.objects.filter(pk=author.pk).update(
+        recipes_count=0, subscribers_count=7)
+    call_command('recount_user_counters')
+    author.refresh_from_db()
+    assert (author.recipes_count, author.subscribers_count) == (2, 1)
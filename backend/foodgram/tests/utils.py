@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_max_queries(budget, using=DEFAULT_DB_ALIAS):
+    """
+    Проверяет, что блок выполнил не больше budget SQL-запросов.
+
+    Аналог assertNumQueries с верхней границей: в сообщении об ошибке
+    перечисляются все выполненные запросы.
+    """
+    context = CaptureQueriesContext(connections[using])
+    with context:
+        yield context
+    executed = len(context)
+    assert executed <= budget, (
+        f'Выполнено {executed} SQL-запросов при бюджете {budget}:\n'
+        + '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(context.captured_queries, 1)
+        )
+    )
@@ -1,6 +1,13 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
 
+from core.querysets import CounterQuerySet
+
+
+class UserManager(BaseUserManager.from_queryset(CounterQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     password = models.CharField(("password"), max_length=150)
@@ -17,6 +24,15 @@ class User(AbstractUser):
                                  max_length=150,
                                  blank=False,
                                  null=False)
+    recipes_count = models.PositiveIntegerField('recipes count',
+                                                default=0,
+                                                editable=False)
+    subscribers_count = models.PositiveIntegerField('subscribers count',
+                                                    default=0,
+                                                    editable=False)
+
+    objects = UserManager()
+
     REQUIRED_FIELDS = ["email", "password", "first_name", "last_name"]
 
     class Meta(AbstractUser.Meta):
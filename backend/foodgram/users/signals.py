@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscription, User
+
+
+@receiver(post_save, sender=Subscription)
+def subscribers_count_increment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        User.objects.filter(pk=instance.author_id).change_counter(
+            'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscribers_count_decrement(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).change_counter(
+        'subscribers_count', -1)